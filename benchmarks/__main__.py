@@ -0,0 +1,121 @@
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from .cases import CASES, Fixture
+from .timer import measure
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark tiny_sqlite_orm hot paths against raw sqlite3.'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument(
+        '--databases', nargs='+', choices=('memory', 'file'),
+        default=['memory', 'file']
+    )
+    parser.add_argument('--cases', nargs='+', choices=tuple(CASES), default=list(CASES))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warmups', type=int, default=1)
+    parser.add_argument('--min-time', type=float, default=0.05)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='previous results file to compare with')
+    return parser.parse_args(argv)
+
+
+def run(args):
+    results = []
+    for database in args.databases:
+        for size in args.sizes:
+            for name in args.cases:
+                fixture = Fixture(database, size)
+                try:
+                    orm, raw = CASES[name](fixture)
+                    for implementation, function in (('orm', orm), ('sqlite3', raw)):
+                        stats = measure(
+                            function, args.runs, args.warmups, args.min_time
+                        )
+                        results.append({
+                            'case': name,
+                            'database': database,
+                            'size': size,
+                            'implementation': implementation,
+                            **stats,
+                        })
+                        print_result(results[-1])
+                finally:
+                    fixture.close()
+    return results
+
+
+def print_result(result):
+    print(
+        f"{result['case']:<16} {result['database']:<7} {result['size']:>8} "
+        f"{result['implementation']:<8} {result['mean'] * 1e6:>12.2f} us "
+        f"+- {result['stdev'] * 1e6:.2f}"
+    )
+
+
+def get_metadata():
+    return {
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+    }
+
+
+def key(result):
+    return (
+        result['case'], result['database'], result['size'],
+        result['implementation']
+    )
+
+
+def print_overhead(results):
+    baselines = {key(result): result for result in results}
+    print('\nORM overhead over raw sqlite3 (mean time ratio):')
+    for result in results:
+        if result['implementation'] != 'orm':
+            continue
+        baseline = baselines.get(key({**result, 'implementation': 'sqlite3'}))
+        if baseline and baseline['mean']:
+            print(
+                f"{result['case']:<16} {result['database']:<7} "
+                f"{result['size']:>8} {result['mean'] / baseline['mean']:>8.2f}x"
+            )
+
+
+def print_comparison(results, path):
+    with open(path, encoding='utf-8') as file:
+        previous = {key(result): result for result in json.load(file)['results']}
+
+    print(f'\nChange against {path} (mean time, negative is faster):')
+    for result in results:
+        before = previous.get(key(result))
+        if before and before['mean']:
+            change = (result['mean'] - before['mean']) / before['mean'] * 100
+            print(
+                f"{result['case']:<16} {result['database']:<7} "
+                f"{result['size']:>8} {result['implementation']:<8} {change:>+8.1f}%"
+            )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+    print_overhead(results)
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({'metadata': get_metadata(), 'results': results}, file, indent=2)
+    print(f'\nResults saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
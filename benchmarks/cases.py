@@ -0,0 +1,194 @@
+import os
+import random
+import tempfile
+from itertools import cycle
+from tiny_sqlite_orm import (
+    Database, Table, TextField, IntegerField, ForeignKeyField, Count, Sum, Max
+)
+
+
+class BenchAuthor(Table):
+
+    name = TextField()
+
+
+class BenchBook(Table):
+
+    title = TextField()
+    price = IntegerField(index=True)
+    author = ForeignKeyField(BenchAuthor)
+
+
+class Fixture:
+
+    def __init__(self, database, size):
+        self.database = database
+        self.size = size
+        self.tmp_dir = None
+
+        path = ':memory:'
+        if database == 'file':
+            self.tmp_dir = tempfile.TemporaryDirectory()
+            path = os.path.join(self.tmp_dir.name, 'bench.db')
+
+        self.db = Database(path)
+        self.db.create_tables_if_not_exists([BenchAuthor, BenchBook])
+        self.conn = self.db._conn
+        self.__populate()
+
+        generator = random.Random(size)
+        pks = list(range(1, size + 1))
+        generator.shuffle(pks)
+        self.pks = cycle(pks)
+        self.prices = cycle(generator.randrange(0, 1000) for _ in range(1000))
+
+    def __populate(self):
+        authors = max(self.size // 10, 1)
+        BenchAuthor.bulk_create(
+            [{'name': f'Author{index}'} for index in range(authors)],
+            return_records=False
+        )
+        BenchBook.bulk_create(
+            [
+                {
+                    'title': f'Book{index}',
+                    'price': index % 1000,
+                    'author': index % authors + 1,
+                }
+                for index in range(self.size)
+            ],
+            return_records=False
+        )
+
+    def close(self):
+        self.db.disconnect()
+        if self.tmp_dir is not None:
+            self.tmp_dir.cleanup()
+
+
+def point_lookup(fixture):
+    def orm():
+        BenchBook.objects.filter(pk=next(fixture.pks)).first()
+
+    def raw():
+        fixture.conn.execute(
+            'SELECT * FROM benchbook WHERE id = ? LIMIT 1;', (next(fixture.pks),)
+        ).fetchone()
+
+    return orm, raw
+
+
+def get_by_pk(fixture):
+    def orm():
+        BenchBook.objects.get(next(fixture.pks))
+
+    def raw():
+        fixture.conn.execute(
+            'SELECT * FROM benchbook WHERE id = ? LIMIT 1;', (next(fixture.pks),)
+        ).fetchone()
+
+    return orm, raw
+
+
+def range_scan(fixture):
+    def orm():
+        price = next(fixture.prices)
+        list(BenchBook.objects.filter(price__ge=price, price__lt=price + 10))
+
+    def raw():
+        price = next(fixture.prices)
+        fixture.conn.execute(
+            'SELECT * FROM benchbook WHERE price >= ? AND price < ?;',
+            (price, price + 10)
+        ).fetchall()
+
+    return orm, raw
+
+
+def aggregate(fixture):
+    def orm():
+        BenchBook.objects.aggregate(n=Count(), total=Sum('price'), top=Max('price'))
+
+    def raw():
+        fixture.conn.execute(
+            'SELECT COUNT(*), SUM(price), MAX(price) FROM benchbook;'
+        ).fetchone()
+
+    return orm, raw
+
+
+def fk_select(fixture):
+    def orm():
+        for book in BenchBook.objects.select_related('author')[:100]:
+            book.author.name
+
+    def raw():
+        fixture.conn.execute(
+            'SELECT benchbook.*, t1.* FROM benchbook '
+            'LEFT JOIN benchauthor AS t1 ON t1.id = benchbook.author '
+            'LIMIT 100;'
+        ).fetchall()
+
+    return orm, raw
+
+
+def update(fixture):
+    records = cycle(list(BenchBook.objects[:100]))
+
+    def orm():
+        record = next(records)
+        record.price = next(fixture.prices)
+        record.save()
+
+    def raw():
+        fixture.conn.execute(
+            'UPDATE benchbook SET price = ? WHERE id = ?;',
+            (next(fixture.prices), next(fixture.pks))
+        )
+
+    return orm, raw
+
+
+def single_insert(fixture):
+    def orm():
+        BenchBook.create(title='New', price=next(fixture.prices), author=1)
+
+    def raw():
+        fixture.conn.execute(
+            'INSERT INTO benchbook (title, price, author) VALUES (?, ?, ?);',
+            ('New', next(fixture.prices), 1)
+        )
+
+    return orm, raw
+
+
+def bulk_insert(fixture):
+    rows = [
+        {'title': f'Bulk{index}', 'price': index, 'author': 1}
+        for index in range(100)
+    ]
+
+    def orm():
+        BenchBook.bulk_create(rows, return_records=False)
+
+    def raw():
+        fixture.conn.execute('BEGIN;')
+        fixture.conn.executemany(
+            'INSERT INTO benchbook (title, price, author) VALUES (?, ?, ?);',
+            [(row['title'], row['price'], row['author']) for row in rows]
+        )
+        fixture.conn.execute('COMMIT;')
+
+    return orm, raw
+
+
+CASES = {
+    'point_lookup': point_lookup,
+    'get_by_pk': get_by_pk,
+    'range_scan': range_scan,
+    'aggregate': aggregate,
+    'fk_select': fk_select,
+    'update': update,
+    'single_insert': single_insert,
+    'bulk_insert_100': bulk_insert,
+}
@@ -0,0 +1,41 @@
+import statistics
+import time
+
+
+def calibrate_loops(function, min_time):
+    loops = 1
+    while True:
+        elapsed = time_loops(function, loops)
+        if elapsed >= min_time or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def time_loops(function, loops):
+    started = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return time.perf_counter() - started
+
+
+def measure(function, runs=5, warmups=1, min_time=0.05, loops=None):
+    loops = loops or calibrate_loops(function, min_time)
+    for _ in range(warmups):
+        time_loops(function, loops)
+
+    timings = [time_loops(function, loops) / loops for _ in range(runs)]
+    return summarize(timings, loops)
+
+
+def summarize(timings, loops):
+    mean = statistics.mean(timings)
+    return {
+        'runs': len(timings),
+        'loops': loops,
+        'mean': mean,
+        'median': statistics.median(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'min': min(timings),
+        'max': max(timings),
+        'ops_per_second': 1 / mean if mean else 0.0,
+    }
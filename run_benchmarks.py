@@ -0,0 +1,3 @@
+import os
+
+os.system('python -m benchmarks')
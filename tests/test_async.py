@@ -0,0 +1,148 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from tiny_sqlite_orm import (
+    AsyncDatabase, Database, Table, TextField, IntegerField, ForeignKeyField
+)
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp_dir.name, 'test.db')
+        cls.db = AsyncDatabase(cls.path)
+        cls.team = type(
+            'AsyncTeam', (Table,), {'name': TextField()}
+        )
+        cls.player = type(
+            'AsyncPlayer',
+            (Table,),
+            {
+                'username': TextField(),
+                'age': IntegerField(default=18),
+                'team': ForeignKeyField(cls.team),
+            }
+        )
+        cls.db.create_tables_if_not_exists([cls.team, cls.player])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.disconnect()
+        cls.tmp_dir.cleanup()
+
+    async def asyncSetUp(self):
+        await self.player.objects.delete()
+        await self.team.objects.delete()
+        self.team_record = await self.team.create(name='Team1')
+
+    def count_from_other_connection(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(
+                f'SELECT COUNT(*) FROM {self.player.table_name};'
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    async def test_create_and_await_queryset(self):
+        await self.player.create(username='User1', age=20, team=self.team_record)
+        await self.player.objects.bulk_insert([
+            {'username': 'User2', 'team': self.team_record},
+            {'username': 'User3', 'team': self.team_record},
+        ])
+
+        records = await self.player.objects.filter(age=18).order_by('username')
+        self.assertEqual([r.username for r in records], ['User2', 'User3'])
+        self.assertEqual(await self.player.objects.count(), 3)
+        self.assertTrue(await self.player.objects.exists(username='User1'))
+        self.assertEqual((await self.player.objects.first()).username, 'User1')
+        self.assertEqual((await self.player.objects[-1]).username, 'User3')
+
+    async def test_async_for_streams_in_chunks(self):
+        await self.player.objects.bulk_insert(
+            [{'username': f'User{i}', 'team': self.team_record} for i in range(5)]
+        )
+        queryset = self.player.objects.order_by('pk')
+        queryset.chunk_size = 2
+
+        names = [record.username async for record in queryset]
+        self.assertEqual(names, [f'User{i}' for i in range(5)])
+
+    async def test_record_save_delete_and_update(self):
+        record = await self.player.create(username='User1', team=self.team_record)
+        record.age = 30
+        await record.save()
+        self.assertEqual((await self.player.objects.first()).age, 30)
+
+        self.assertEqual(await self.player.objects.update({'age': 31}), 1)
+        await record.delete()
+        self.assertEqual(await self.player.objects.count(), 0)
+
+    async def test_lazy_reference_load(self):
+        await self.player.create(username='User1', team=self.team_record)
+
+        player = await self.player.objects.first()
+        self.assertFalse(player.team.is_loaded)
+        with self.assertRaises(RuntimeError):
+            player.team.name
+        loaded = await player.team.load()
+        self.assertEqual(loaded.name, 'Team1')
+        self.assertEqual(player.team.name, 'Team1')
+
+        deferred = await self.player.objects.defer('age').first()
+        with self.assertRaises(RuntimeError):
+            deferred.age
+
+    async def test_transaction_commits_and_rolls_back(self):
+        async with self.db.transaction():
+            await self.player.create(username='User1', team=self.team_record)
+            self.assertEqual(self.count_from_other_connection(), 0)
+        self.assertEqual(self.count_from_other_connection(), 1)
+
+        with self.assertRaises(RuntimeError):
+            async with self.db.transaction():
+                await self.player.create(username='User2', team=self.team_record)
+                raise RuntimeError
+        self.assertEqual(await self.player.objects.count(), 1)
+
+    async def test_transaction_is_isolated_from_other_tasks(self):
+        entered = asyncio.Event()
+
+        async def failing_transaction():
+            with self.assertRaises(RuntimeError):
+                async with self.db.transaction():
+                    await self.player.create(username='User1', team=self.team_record)
+                    async with self.db.transaction():
+                        await self.player.objects.count()
+                    entered.set()
+                    await asyncio.sleep(0.05)
+                    raise RuntimeError
+
+        async def create_outside_transaction():
+            await entered.wait()
+            await self.player.create(username='User2', team=self.team_record)
+
+        await asyncio.gather(failing_transaction(), create_outside_transaction())
+        records = await self.player.objects
+        self.assertEqual([record.username for record in records], ['User2'])
+        self.assertEqual(self.count_from_other_connection(), 1)
+
+    async def test_sync_iteration_is_rejected(self):
+        with self.assertRaises(RuntimeError):
+            list(self.player.objects)
+
+
+class TestAwaitOnSyncDatabase(unittest.TestCase):
+
+    def test_await_requires_async_database(self):
+        db = Database(':memory:')
+        table = type('SyncOnlyTable', (Table,), {'name': TextField()})
+        db.create_tables_if_not_exists([table])
+
+        with self.assertRaises(TypeError):
+            table.objects.__await__()
+        db.disconnect()
@@ -0,0 +1,26 @@
+import unittest
+from benchmarks.cases import CASES, Fixture
+from benchmarks.timer import measure
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_measure_reports_stats(self):
+        stats = measure(lambda: None, runs=3, warmups=0, loops=10)
+        self.assertEqual(stats['runs'], 3)
+        self.assertEqual(stats['loops'], 10)
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['max'])
+        self.assertGreater(stats['ops_per_second'], 0)
+
+    def test_every_case_runs_against_both_implementations(self):
+        for database in ('memory', 'file'):
+            fixture = Fixture(database, 20)
+            try:
+                for name, case in CASES.items():
+                    with self.subTest(case=name, database=database):
+                        orm, raw = case(fixture)
+                        orm()
+                        raw()
+            finally:
+                fixture.close()
@@ -0,0 +1,523 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from tiny_sqlite_orm import (
+    Database, Table, TextField, IntegerField, ForeignKeyField
+)
+
+
+class TestCaseWithFileDatabase(unittest.TestCase):
+
+    database_options = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp_dir.name, 'test.db')
+        cls.db = Database(cls.path, **cls.database_options)
+        cls.table = type(
+            f'{cls.__name__}Table',
+            (Table,),
+            {'username': TextField(), 'age': IntegerField(default=18)}
+        )
+        cls.db.create_tables_if_not_exists([cls.table])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.disconnect()
+        cls.tmp_dir.cleanup()
+
+    def setUp(self):
+        self.db.rollback()
+        self.table.objects.delete()
+        self.db.commit()
+
+    def count_from_other_connection(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(
+                f'SELECT COUNT(*) FROM {self.table.table_name};'
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+
+class TestTransaction(TestCaseWithFileDatabase):
+
+    def test_commits_at_block_exit(self):
+        with self.db.transaction():
+            self.table.create(username='User1')
+            self.table.create(username='User2')
+            self.assertTrue(self.db.in_transaction)
+            self.assertEqual(self.count_from_other_connection(), 0)
+
+        self.assertFalse(self.db.in_transaction)
+        self.assertEqual(self.count_from_other_connection(), 2)
+
+    def test_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.table.create(username='User1')
+                raise RuntimeError
+
+        self.assertEqual(self.table.objects.count(), 0)
+
+    def test_nested_transaction_uses_savepoint(self):
+        with self.db.transaction():
+            self.table.create(username='Outer')
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.table.create(username='Inner')
+                    raise RuntimeError
+            self.assertEqual(self.table.objects.count(), 1)
+
+        self.assertEqual(self.table.objects.select(username='Outer').count(), 1)
+        self.assertEqual(self.count_from_other_connection(), 1)
+
+    def test_record_methods_join_transaction(self):
+        user = self.table.create(username='User1')
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                user.age = 40
+                user.save()
+                self.table.objects.select(id=user.pk).first().delete()
+                raise RuntimeError
+
+        self.assertEqual(self.table.objects.select(id=user.pk).first().age, 18)
+
+    def test_reads_do_not_open_transaction(self):
+        self.table.objects.select().first()
+        self.table.objects.count()
+        self.assertFalse(self.db.in_transaction)
+
+
+class TestAutocommitDisabled(TestCaseWithFileDatabase):
+
+    database_options = {'autocommit': False}
+
+    def test_writes_wait_for_commit(self):
+        self.table.create(username='User1')
+        self.table.objects.update({'age': 20}, username='User1')
+        self.assertTrue(self.db.in_transaction)
+        self.assertEqual(self.count_from_other_connection(), 0)
+
+        self.db.commit()
+        self.assertFalse(self.db.in_transaction)
+        self.assertEqual(self.count_from_other_connection(), 1)
+
+    def test_rollback_discards_writes(self):
+        self.table.create(username='User1')
+        self.db.rollback()
+        self.assertEqual(self.table.objects.count(), 0)
+
+    def test_transaction_block_inside_pending_writes(self):
+        self.table.create(username='User1')
+        with self.db.transaction():
+            self.table.create(username='User2')
+
+        self.assertTrue(self.db.in_transaction)
+        self.assertEqual(self.count_from_other_connection(), 0)
+        self.db.commit()
+        self.assertEqual(self.count_from_other_connection(), 2)
+
+
+class TestConnectionPool(TestCaseWithFileDatabase):
+
+    database_options = {'pool_size': 2, 'pool_timeout': 0.2}
+
+    def test_memory_database_cannot_be_pooled(self):
+        with self.assertRaises(ValueError):
+            Database(':memory:', pool_size=2)
+
+    def test_uses_wal_and_separate_read_connections(self):
+        journal_mode = self.db._conn.execute('PRAGMA journal_mode;').fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+        self.table.create(username='User1')
+        self.assertEqual(self.table.objects.count(), 1)
+        stats = self.db.pool_stats()
+        self.assertEqual(stats['pool_size'], 2)
+        self.assertGreaterEqual(stats['connections'], 1)
+        self.assertGreaterEqual(stats['checkouts'], 1)
+        self.assertIn('avg_checkout_time', stats)
+
+    def test_threads_share_models(self):
+        errors = []
+
+        def work(index):
+            try:
+                for number in range(20):
+                    self.table.create(username=f'User{index}-{number}')
+                    self.table.objects.filter(username__contains=f'User{index}').count()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(errors, [])
+        self.assertEqual(self.table.objects.count(), 80)
+
+    def test_transaction_is_private_to_its_thread(self):
+        counts = []
+        with self.db.transaction():
+            self.table.create(username='User1')
+            self.assertEqual(self.table.objects.count(), 1)
+
+            reader = threading.Thread(target=lambda: counts.append(self.table.objects.count()))
+            reader.start()
+            reader.join()
+
+        self.assertListEqual(counts, [0])
+        self.assertEqual(self.table.objects.count(), 1)
+
+    def test_checkout_times_out_when_pool_is_exhausted(self):
+        self.table.bulk_create([{'username': f'User{index}'} for index in range(5)])
+        errors = []
+        started, done = threading.Event(), threading.Event()
+        first = self.table.objects.iterator(chunk_size=1)
+        next(first)
+
+        def hold():
+            second = self.table.objects.iterator(chunk_size=1)
+            next(second)
+            started.set()
+            done.wait()
+            second.close()
+
+        def read():
+            try:
+                self.table.objects.count()
+            except TimeoutError as error:
+                errors.append(error)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        started.wait()
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join()
+        done.set()
+        holder.join()
+        first.close()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.db.pool_stats()['timeouts'], 1)
+        self.assertEqual(self.table.objects.count(), 5)
+
+
+class TestSingleConnectionPool(TestCaseWithFileDatabase):
+
+    database_options = {'pool_size': 1, 'pool_timeout': 0.2}
+
+    def test_nested_reads_reuse_the_thread_connection(self):
+        owner_table = type(
+            'SingleConnectionPoolOwner', (Table,),
+            {'owner': ForeignKeyField(self.table)}
+        )
+        self.db.create_tables_if_not_exists([owner_table])
+        owner_table.bulk_create([
+            {'owner': self.table.create(username=f'User{index}')}
+            for index in range(3)
+        ])
+
+        names = []
+        for record in owner_table.objects.iterator(chunk_size=1):
+            names.append(record.owner.username)
+            self.assertEqual(self.table.objects.count(), 3)
+
+        self.assertListEqual(names, ['User0', 'User1', 'User2'])
+        self.assertEqual(self.db.pool_stats()['timeouts'], 0)
+        self.assertEqual(self.db.pool_stats()['in_use'], 0)
+
+
+class TestPragmaProfiles(TestCaseWithFileDatabase):
+
+    database_options = {
+        'profile': 'throughput',
+        'pragmas': {'cache_size': -2000},
+        'pool_size': 1,
+    }
+
+    def test_profile_and_overrides_are_applied(self):
+        self.assertDictEqual(self.db.get_pragmas(), {
+            'foreign_keys': 1,
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'cache_size': -2000,
+            'mmap_size': 268435456,
+            'temp_store': 2,
+            'busy_timeout': 5000,
+        })
+
+    def test_pragmas_are_applied_to_every_connection(self):
+        conn = self.db._connect(read_only=True)
+        try:
+            self.assertEqual(conn.execute('PRAGMA cache_size;').fetchone()[0], -2000)
+            self.assertEqual(conn.execute('PRAGMA synchronous;').fetchone()[0], 1)
+            self.assertEqual(conn.execute('PRAGMA query_only;').fetchone()[0], 1)
+        finally:
+            conn.close()
+
+    def test_invalid_profile_or_pragma(self):
+        with self.assertRaises(ValueError):
+            Database(':memory:', profile='fastest')
+        with self.assertRaises(ValueError):
+            Database(':memory:', pragmas={'cache_size': '1; DROP TABLE x'})
+
+    def test_readonly_profile_rejects_writes(self):
+        db = Database(self.path, profile='readonly')
+        try:
+            self.assertEqual(db.get_pragmas()['query_only'], 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                db._execute_write(f'DELETE FROM {self.table.table_name};')
+        finally:
+            db.disconnect()
+
+
+class TestQueryCache(TestCaseWithFileDatabase):
+
+    database_options = {'query_cache_size': 4}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other_table = type(
+            'QueryCacheOtherTable', (Table,), {'name': TextField()}
+        )
+        cls.db.create_tables_if_not_exists([cls.other_table])
+
+    def setUp(self):
+        super().setUp()
+        self.other_table.objects.delete()
+        self.table.create(username='User1', age=20)
+        self.db.clear_query_cache()
+        self.initial_stats = self.db.query_cache_stats()
+
+    def stats(self, name):
+        return self.db.query_cache_stats()[name] - self.initial_stats[name]
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.assertEqual(self.table.objects.count(), 1)
+        self.assertEqual(self.table.objects.count(), 1)
+        self.assertEqual(self.table.objects.first().username, 'User1')
+        self.assertEqual(self.table.objects.first().username, 'User1')
+
+        self.assertEqual(self.stats('misses'), 2)
+        self.assertEqual(self.stats('hits'), 2)
+        self.assertEqual(self.db.query_cache_stats()['size'], 2)
+
+    def test_writes_invalidate_only_their_table(self):
+        self.assertEqual(self.table.objects.count(), 1)
+        self.assertEqual(self.other_table.objects.count(), 0)
+
+        self.other_table.create(name='Other')
+        self.assertEqual(self.other_table.objects.count(), 1)
+        self.assertEqual(self.table.objects.count(), 1)
+        self.assertEqual(self.stats('hits'), 1)
+
+        record = self.table.objects.first()
+        record.age = 30
+        record.save()
+        self.assertEqual(self.table.objects.first().age, 30)
+        self.table.objects.update({'age': 31})
+        self.assertEqual(self.table.objects.sum('age'), 31)
+        self.table.objects.delete()
+        self.assertEqual(self.table.objects.count(), 0)
+
+    def test_rollback_invalidates_reads_made_inside_the_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.table.create(username='User2')
+                self.assertEqual(self.table.objects.count(), 2)
+                raise RuntimeError
+        self.assertEqual(self.table.objects.count(), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for age in range(6):
+            self.table.objects.count(age=age)
+        self.assertEqual(self.db.query_cache_stats()['size'], 4)
+        self.assertEqual(self.stats('evictions'), 2)
+
+        self.table.objects.count(age=5)
+        self.table.objects.count(age=0)
+        self.assertEqual(self.stats('hits'), 1)
+
+    def test_entries_expire_after_ttl(self):
+        self.db._query_cache.ttl = 10
+        try:
+            with patch('tiny_sqlite_orm.cache.time.monotonic', return_value=100):
+                self.table.objects.count()
+            with patch('tiny_sqlite_orm.cache.time.monotonic', return_value=105):
+                self.table.objects.count()
+            with patch('tiny_sqlite_orm.cache.time.monotonic', return_value=111):
+                self.table.objects.count()
+        finally:
+            self.db._query_cache.ttl = None
+        self.assertEqual(self.stats('hits'), 1)
+        self.assertEqual(self.stats('misses'), 2)
+
+    def test_cache_is_disabled_by_default(self):
+        db = Database(':memory:')
+        self.assertDictEqual(db.query_cache_stats(), {})
+        db.disconnect()
+
+
+class TestPooledQueryCache(TestCaseWithFileDatabase):
+
+    database_options = {'pool_size': 2, 'query_cache_size': 4}
+
+    def test_uncommitted_reads_are_not_shared_between_threads(self):
+        user = self.table.create(username='User1', age=20)
+        self.db.clear_query_cache()
+        ages = []
+
+        def read():
+            ages.append(self.table.objects.select(id=user.pk).first().age)
+            ages.append(self.table.objects.sum('age'))
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.table.objects.update({'age': 30})
+                self.assertEqual(self.table.objects.select(id=user.pk).first().age, 30)
+                self.assertEqual(self.table.objects.sum('age'), 30)
+
+                reader = threading.Thread(target=read)
+                reader.start()
+                reader.join()
+                raise RuntimeError
+
+        self.assertListEqual(ages, [20, 20])
+        self.assertEqual(self.table.objects.select(id=user.pk).first().age, 20)
+
+
+class TestInstrumentation(TestCaseWithFileDatabase):
+
+    def setUp(self):
+        super().setUp()
+        self.table.bulk_create([{'username': f'User{index}'} for index in range(3)])
+
+    def test_hooks_receive_sql_params_duration_and_rows(self):
+        before, after = [], []
+        hook = self.db.add_query_hook(
+            before=lambda sql, params: before.append((sql, params)),
+            after=after.append
+        )
+        try:
+            list(self.table.objects.filter(username__ne='User0'))
+            self.table.objects.update({'age': 30}, username='User1')
+        finally:
+            self.db.remove_query_hook(hook)
+        self.table.objects.count()
+
+        self.assertEqual(len(before), 2)
+        self.assertEqual(before[0][1], ('User0',))
+        self.assertListEqual([event.rows for event in after], [2, 1])
+        self.assertListEqual(
+            [event.table for event in after], [self.table.table_name] * 2
+        )
+        self.assertTrue(all(event.duration >= 0 for event in after))
+
+    def test_count_queries(self):
+        with self.db.count_queries() as counter:
+            self.table.objects.count()
+            record = self.table.objects.first()
+            record.save()
+
+        self.assertEqual(counter.count, 3)
+        self.assertGreater(counter.total_time, 0)
+        self.assertIn('COUNT(*)', counter.statements[0])
+        self.assertFalse(self.db._instrumentation.enabled)
+
+    def test_slow_query_log(self):
+        self.db.set_slow_query_threshold(0)
+        try:
+            with self.assertLogs('tiny_sqlite_orm', level='WARNING') as logs:
+                self.table.objects.count()
+        finally:
+            self.db.set_slow_query_threshold(None)
+
+        self.assertIn('Slow query', logs.output[0])
+        self.assertIn('COUNT(*)', self.db.slow_queries[-1].sql)
+
+    def test_per_table_stats(self):
+        self.db.collect_query_stats()
+        try:
+            self.table.objects.count()
+            list(self.table.objects)
+            self.table.objects.delete(username='User2')
+        finally:
+            self.db.collect_query_stats(False)
+
+        stats = self.db.query_stats()[self.table.table_name]
+        self.assertEqual(stats['queries'], 3)
+        self.assertEqual(stats['rows'], 1 + 3 + 1)
+        self.assertGreaterEqual(stats['max_time'], stats['avg_time'])
+        self.db.reset_query_stats()
+        self.assertDictEqual(self.db.query_stats(), {})
+
+
+class TestIndexAdvisor(TestCaseWithFileDatabase):
+
+    def tearDown(self):
+        self.db.stop_index_advisor()
+
+    def test_explain_returns_the_plan_tree(self):
+        plan = self.table.objects.filter(age__ge=18).explain()
+        self.assertListEqual(plan.full_scans, [self.table.table_name])
+        self.assertEqual(str(plan), f'SCAN {self.table.table_name}')
+
+        plan = self.table.objects.filter(pk=1).explain()
+        self.assertListEqual(plan.full_scans, [])
+        self.assertTrue(plan.nodes[0].detail.startswith('SEARCH'))
+
+    def test_advises_indexes_for_scanned_filters(self):
+        self.db.start_index_advisor()
+        self.table.objects.filter(username='User1', age__ge=18).count()
+        self.table.objects.filter(age__gt=5, username='User2').first()
+        self.table.objects.filter(username__contains='User').count()
+        self.table.objects.filter(pk=1).first()
+
+        suggestions = self.db.advise_indexes()
+        self.assertEqual(len(suggestions), 1)
+        suggestion = suggestions[0]
+        self.assertTupleEqual(suggestion['columns'], ('username', 'age'))
+        self.assertEqual(len(suggestion['queries']), 2)
+        self.assertEqual(
+            suggestion['sql'],
+            f'CREATE INDEX IF NOT EXISTS idx_{self.table.table_name}_username_age '
+            f'ON {self.table.table_name} (username, age);'
+        )
+
+        self.db._execute_schema(suggestion['sql'])
+        try:
+            self.assertListEqual(self.db.advise_indexes(), [])
+        finally:
+            self.db._execute_schema(
+                f'DROP INDEX idx_{self.table.table_name}_username_age;'
+            )
+
+    def test_ignores_negated_conditions(self):
+        self.db.start_index_advisor()
+        self.table.objects.exclude(age=3).count()
+        self.table.objects.filter(username='User1').exclude(age=3).count()
+
+        suggestions = self.db.advise_indexes()
+        self.assertEqual(len(suggestions), 1)
+        self.assertTupleEqual(suggestions[0]['columns'], ('username',))
+
+    def test_advise_requires_the_advisor(self):
+        db = Database(':memory:')
+        with self.assertRaises(RuntimeError):
+            db.advise_indexes()
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
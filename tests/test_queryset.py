@@ -1,6 +1,8 @@
 import unittest
 from tests.fixtures import TestCaseWithTables
-from tiny_sqlite_orm import CharField, IntegerField
+from tiny_sqlite_orm import (
+    CharField, TextField, IntegerField, Count, Sum, Avg, Max, Min
+)
 
 
 unittest.TestLoader.sortTestMethodsUsing = None
@@ -23,9 +25,10 @@ class TestQueryset(TestCaseWithTables):
         cls.user3 = table.create(username='User for delete', age=50)
         cls.queryset = table.objects
 
-    def check_select_query(self, expected_query, **select_args):
+    def check_select_query(self, expected_query, expected_params=(), **select_args):
         query = self.queryset.select(**select_args)
         self.assertEqual(expected_query, str(query))
+        self.assertTupleEqual(expected_params, query.params)
         return query
 
     def test_select_all(self):
@@ -34,27 +37,43 @@ class TestQueryset(TestCaseWithTables):
         )
         self.check_if_query_matches_all_users(query)
 
+    def test_select_chained_keeps_earlier_params(self):
+        query = self.queryset.select(age__ge=30).select(username='User1')
+        self.assertEqual(
+            str(query),
+            'SELECT * FROM querysettesting WHERE age >= ? AND username = ?;'
+        )
+        self.assertTupleEqual(query.params, (30, 'User1'))
+        self.assertDictEqual(query.first().attrs, self.user1.attrs)
+
+    def test_select_value_is_not_inlined(self):
+        query = self.queryset.select(username="User1' OR '1'='1")
+        self.assertIsNone(query.first())
+
     def check_if_query_matches_all_users(self, query):
         self.assertDictEqual(query.first().attrs, self.user1.attrs)
         self.assertDictEqual(query.last().attrs, self.user2.attrs)
 
     def test_select_equal(self):
         query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE username = \'User1\';',
+            'SELECT * FROM querysettesting WHERE username = ?;',
+            ('User1',),
             username='User1',
         )
         self.assertDictEqual(query.first().attrs, self.user1.attrs)
 
     def test_select_not_equal(self):
         query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE username <> \'User1\';',
+            'SELECT * FROM querysettesting WHERE username <> ?;',
+            ('User1',),
             username__ne='User1',
         )
         self.assertDictEqual(query.first().attrs, self.user2.attrs)
 
     def test_select_greater_filters(self):
         query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE age > 20 AND age >= 30;',
+            'SELECT * FROM querysettesting WHERE age > ? AND age >= ?;',
+            (20, 30),
             age__gt=20,
             age__ge=30,
         )
@@ -62,7 +81,8 @@ class TestQueryset(TestCaseWithTables):
 
     def test_select_less_filters(self):
         query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE age < 60 AND age <= 50;',
+            'SELECT * FROM querysettesting WHERE age < ? AND age <= ?;',
+            (60, 50),
             age__lt=60,
             age__le=50,
         )
@@ -70,18 +90,21 @@ class TestQueryset(TestCaseWithTables):
 
     def test_select_in(self):
         query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE username IN (\'User1\', \'user2\');',
+            'SELECT * FROM querysettesting WHERE username IN (?, ?);',
+            ('User1', 'user2'),
             username__in=['User1', 'user2']
         )
         self.check_if_query_matches_all_users(query)
 
     def test_select_contains_and_icontains(self):
         contains_query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE instr(username, \'User\') > 0;',
+            'SELECT * FROM querysettesting WHERE instr(username, ?) > 0;',
+            ('User',),
             username__contains='User',
         )
         icontains_query = self.check_select_query(
-            'SELECT * FROM querysettesting WHERE username LIKE lower(\'%User%\');',
+            'SELECT * FROM querysettesting WHERE username LIKE lower(?);',
+            ('%User%',),
             username__icontains='User',
         )
 
@@ -96,26 +119,631 @@ class TestQueryset(TestCaseWithTables):
         self.assertEqual(int(self.queryset.avg('age')), 43)
 
     def test_update(self):
-        expected_update_query = 'UPDATE querysettesting SET username = \'User2\' WHERE username = \'user2\';'
-        query = self.queryset.update(
+        updated = self.queryset.update(
             {'username': 'User2'},
             username='user2'
         )
         updated_user2 = self.queryset.select(id=self.user2.id).first()
 
-        self.assertEqual(str(query), expected_update_query)
+        self.assertEqual(updated, 1)
         self.assertEqual(updated_user2.username, 'User2')
 
     def test_delete(self):
-        expected_delete_query = 'DELETE FROM querysettesting WHERE username = \'User for delete\';'
-        query = self.queryset.delete(
+        deleted = self.queryset.delete(
             username=self.user3.username
         )
         deleted_user3 = self.queryset.select(id=self.user3.id).first()
 
-        self.assertEqual(str(query), expected_delete_query)
+        self.assertEqual(deleted, 1)
         self.assertIsNone(deleted_user3)
 
 
+class TestLazyQueryset(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'LazyTesting',
+            {
+                'username': CharField(max_length=50),
+                'age': IntegerField()
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+        cls.table.bulk_create(
+            [{'username': f'User{index}', 'age': index} for index in range(10)]
+        )
+
+    def test_select_does_not_execute_until_iterated(self):
+        query = self.table.objects.select(age__ge=9)
+        user = self.table.create(username='Late', age=99)
+        self.assertListEqual(
+            [record.username for record in query],
+            ['User9', 'Late']
+        )
+        user.delete()
+
+    def test_iterator_streams_in_chunks(self):
+        records = self.table.objects.select().iterator(chunk_size=3)
+        self.assertEqual(next(records).username, 'User0')
+        self.assertEqual(len(list(records)), 9)
+
+    def test_first_last_and_index(self):
+        query = self.table.objects.select(age__lt=5)
+        self.assertEqual(query.first().age, 0)
+        self.assertEqual(query.last().age, 4)
+        self.assertEqual(query[2].age, 2)
+        self.assertEqual(query[-1].age, 4)
+        with self.assertRaises(IndexError):
+            query[5]
+        self.assertIsNone(self.table.objects.select(age=100).first())
+
+    def test_count_and_exists(self):
+        query = self.table.objects.select(age__ge=5)
+        self.assertEqual(query.count(), 5)
+        self.assertEqual(query.count(age__lt=7), 2)
+        self.assertTrue(query.exists())
+        self.assertFalse(query.exists(age=1))
+
+    def test_iterate_uses_keyset_batches(self):
+        statements = []
+        self.db._conn.set_trace_callback(statements.append)
+        try:
+            ages = [record.age for record in self.table.objects.filter(
+                age__ge=2
+            ).iterate(batch_size=3)]
+        finally:
+            self.db._conn.set_trace_callback(None)
+
+        self.assertListEqual(ages, list(range(2, 10)))
+        self.assertEqual(len(statements), 3)
+        self.assertIn('AND id > 8 ORDER BY id LIMIT 3 OFFSET 0', statements[-1])
+
+        names = [r.username for r in self.table.objects.iterate(4, order_by='-age')]
+        self.assertListEqual(names, [f'User{index}' for index in range(9, -1, -1)])
+
+    def test_iterate_breaks_ties_with_pk(self):
+        table = self.create_table(
+            'KeysetTesting', {'category': IntegerField(), 'position': IntegerField()}
+        )
+        self.db.create_tables_if_not_exists([table])
+        table.bulk_create(
+            [{'category': index % 3, 'position': index} for index in range(10)]
+        )
+
+        records = list(table.objects.iterate(batch_size=2, order_by='category'))
+        self.assertListEqual(
+            [(record.category, record.position) for record in records],
+            sorted(((index % 3, index) for index in range(10)))
+        )
+
+        records = list(table.objects.iterate(batch_size=2, order_by='-category'))
+        self.assertListEqual(
+            [(record.category, record.position) for record in records],
+            sorted(((index % 3, index) for index in range(10)), reverse=True)
+        )
+
+    def test_iterate_over_nullable_column(self):
+        table = self.create_table(
+            'NullKeysetTesting', {'score': IntegerField(null=True)}
+        )
+        self.db.create_tables_if_not_exists([table])
+        nulls = {0, 3, 5, 8, 11}
+        scores = [None if index in nulls else index // 4 for index in range(12)]
+        table.bulk_create([{'score': score} for score in scores])
+
+        def key(record):
+            return (record.score is not None, record.score or 0, record.pk)
+
+        expected = sorted(table.objects, key=key)
+
+        records = list(table.objects.iterate(batch_size=3, order_by='score'))
+        self.assertListEqual(
+            [record.pk for record in records], [record.pk for record in expected]
+        )
+
+        records = list(table.objects.iterate(batch_size=3, order_by='-score'))
+        self.assertListEqual(
+            [record.pk for record in records],
+            [record.pk for record in reversed(expected)]
+        )
+
+    def test_paginate_after(self):
+        first_page = self.table.objects.paginate_after(None, 4)
+        self.assertListEqual([record.age for record in first_page], [0, 1, 2, 3])
+
+        next_page = self.table.objects.paginate_after(first_page.last().pk, 4)
+        self.assertEqual(
+            str(next_page),
+            'SELECT * FROM lazytesting WHERE id > ? ORDER BY id LIMIT ? OFFSET ?;'
+        )
+        self.assertListEqual([record.age for record in next_page], [4, 5, 6, 7])
+
+        with self.assertRaises(ValueError):
+            self.table.objects[:5].paginate_after(None, 4)
+        with self.assertRaises(ValueError):
+            self.table.objects.values('age').iterate()
+
+
+class TestQueryBuilder(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'QueryBuilderTesting',
+            {
+                'username': CharField(max_length=50),
+                'age': IntegerField()
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+        cls.table.bulk_create(
+            [{'username': f'User{index % 3}', 'age': index} for index in range(10)]
+        )
+
+    def test_chaining_is_immutable(self):
+        base = self.table.objects.filter(age__ge=2)
+        filtered = base.exclude(username='User0')
+
+        self.assertEqual(
+            str(base),
+            'SELECT * FROM querybuildertesting WHERE age >= ?;'
+        )
+        self.assertEqual(
+            str(filtered),
+            'SELECT * FROM querybuildertesting WHERE age >= ? AND NOT (username = ?);'
+        )
+        self.assertTupleEqual(filtered.params, (2, 'User0'))
+        self.assertEqual(base.count(), 8)
+        self.assertEqual(filtered.count(), 5)
+
+    def test_order_by_limit_offset(self):
+        query = self.table.objects.order_by('-age').limit(3).offset(2)
+        self.assertEqual(
+            str(query),
+            'SELECT * FROM querybuildertesting WHERE 1 ORDER BY age DESC LIMIT ? OFFSET ?;'
+        )
+        self.assertListEqual([record.age for record in query], [7, 6, 5])
+        self.assertEqual(query.count(), 3)
+        self.assertEqual(query.last().age, 5)
+
+    def test_slicing_maps_to_limit_and_offset(self):
+        query = self.table.objects.order_by('age')[2:8][1:3]
+        self.assertTupleEqual(query.params, (2, 3))
+        self.assertListEqual([record.age for record in query], [3, 4])
+        self.assertListEqual(
+            [record.age for record in self.table.objects.order_by('age')[8:]],
+            [8, 9]
+        )
+        self.assertEqual(self.table.objects.order_by('-age')[0].age, 9)
+        with self.assertRaises(ValueError):
+            self.table.objects[::2]
+
+    def test_order_by_pk_and_last(self):
+        self.assertEqual(self.table.objects.order_by('-pk').first().age, 9)
+        self.assertEqual(self.table.objects.order_by('username', 'age').last().age, 8)
+
+    def test_distinct(self):
+        query = self.table.objects.filter(username='User1').distinct()
+        self.assertEqual(
+            str(query),
+            'SELECT DISTINCT * FROM querybuildertesting WHERE username = ?;'
+        )
+        self.assertEqual(query.count(), 3)
+
+    def test_update_and_delete_respect_slices(self):
+        query = self.table.objects.order_by('-age')[:2]
+        self.assertEqual(query.update({'username': 'Oldest'}), 2)
+        self.assertEqual(self.table.objects.count(username='Oldest'), 2)
+        self.assertEqual(self.table.objects.filter(username='Oldest').delete(), 2)
+        self.assertEqual(self.table.objects.max('age'), 7)
+
+    def test_unknown_column_or_filter(self):
+        with self.assertRaises(ValueError):
+            self.table.objects.filter(unknown=1)
+        with self.assertRaises(ValueError):
+            self.table.objects.order_by('-unknown')
+        with self.assertRaises(ValueError):
+            self.table.objects.filter(age__between=1)
+
+
+class TestRecordsAndRowModes(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'RowModesTesting',
+            {
+                'username': CharField(max_length=50),
+                'age': IntegerField()
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+        cls.table.bulk_create(
+            [{'username': f'User{index}', 'age': index % 2} for index in range(4)]
+        )
+
+    def test_records_use_slots(self):
+        record = self.table.objects.first()
+        self.assertIsInstance(record, self.table._record_class)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertIs(record.table, self.table)
+        with self.assertRaises(AttributeError):
+            record.unknown = 1
+
+    def test_record_keeps_pk_attrs_save_and_delete(self):
+        record = self.table.objects.filter(username='User3').first()
+        self.assertEqual(record.pk, record.id)
+        self.assertDictEqual(
+            record.attrs,
+            {'username': 'User3', 'age': 1, 'id': record.id}
+        )
+
+        record.age = 10
+        record.save()
+        self.assertEqual(self.table.objects.filter(pk=record.pk).first().age, 10)
+
+        record.delete()
+        self.assertFalse(self.table.objects.exists(pk=record.pk))
+        self.table.create(username='User3', age=1)
+
+    def test_only_and_defer_fetch_selected_columns(self):
+        only = self.table.objects.only('username').filter(username='User1')
+        self.assertEqual(
+            str(only),
+            'SELECT username, id FROM rowmodestesting WHERE username = ?;'
+        )
+        deferred = self.table.objects.defer('age').filter(username='User1')
+        self.assertEqual(str(deferred), str(only))
+
+        record = only.first()
+        self.assertEqual(record.username, 'User1')
+        self.assertIsNotNone(record.pk)
+
+    def test_deferred_fields_load_on_access(self):
+        record = self.table.objects.only('id').filter(username='User3').first()
+        statements = []
+        self.db._conn.set_trace_callback(statements.append)
+        try:
+            self.assertEqual(record.age, 1)
+            self.assertEqual(record.username, 'User3')
+        finally:
+            self.db._conn.set_trace_callback(None)
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn('SELECT username, age, id', statements[0])
+        with self.assertRaises(AttributeError):
+            record.unknown
+        with self.assertRaises(ValueError):
+            self.table.objects.defer('unknown')
+
+    def test_values(self):
+        rows = list(self.table.objects.filter(age=0).order_by('username').values('username'))
+        self.assertListEqual(rows, [{'username': 'User0'}, {'username': 'User2'}])
+        self.assertSetEqual(
+            set(self.table.objects.values().first()),
+            {'username', 'age', 'id'}
+        )
+
+    def test_values_list(self):
+        query = self.table.objects.order_by('username').values_list('username', 'age')
+        self.assertEqual(str(query), 'SELECT username, age FROM rowmodestesting WHERE 1 ORDER BY username;')
+        self.assertEqual(query.first(), ('User0', 0))
+
+        named = self.table.objects.order_by('-username').values_list('username', named=True)
+        self.assertEqual(named.first().username, 'User3')
+
+        ages = self.table.objects.values_list('age', flat=True).distinct().order_by('age')
+        self.assertListEqual(list(ages), [0, 1])
+        self.assertEqual(ages.count(), 2)
+
+        with self.assertRaises(ValueError):
+            self.table.objects.values_list('username', 'age', flat=True)
+
+
+class TestAggregates(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'AggregatesTesting',
+            {
+                'team': CharField(max_length=50),
+                'score': IntegerField()
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+        cls.table.bulk_create([
+            {'team': 'A', 'score': 10},
+            {'team': 'A', 'score': 20},
+            {'team': 'B', 'score': 5},
+            {'team': 'B', 'score': 5},
+            {'team': 'C', 'score': 7},
+        ])
+
+    def test_aggregate_runs_a_single_query(self):
+        statements = []
+        self.db._conn.set_trace_callback(statements.append)
+        try:
+            result = self.table.objects.filter(score__gt=5).aggregate(
+                total=Sum('score'),
+                n=Count(),
+                best=Max('score'),
+                teams=Count('team', distinct=True)
+            )
+        finally:
+            self.db._conn.set_trace_callback(None)
+
+        self.assertDictEqual(result, {'total': 37, 'n': 3, 'best': 20, 'teams': 2})
+        self.assertListEqual(statements, [
+            'SELECT SUM(score), COUNT(*), MAX(score), COUNT(DISTINCT team) '
+            'FROM aggregatestesting WHERE score > 5'
+        ])
+
+    def test_annotate_groups_by_values(self):
+        query = self.table.objects.values('team').annotate(
+            total=Sum('score'), n=Count()
+        ).order_by('-total')
+        self.assertEqual(
+            str(query),
+            'SELECT team, SUM(score) AS total, COUNT(*) AS n '
+            'FROM aggregatestesting WHERE 1 GROUP BY team ORDER BY total DESC;'
+        )
+        self.assertListEqual(list(query), [
+            {'team': 'A', 'total': 30, 'n': 2},
+            {'team': 'B', 'total': 10, 'n': 2},
+            {'team': 'C', 'total': 7, 'n': 1},
+        ])
+        self.assertEqual(query.count(), 3)
+
+        rows = self.table.objects.filter(team__ne='C').values_list('team').annotate(
+            avg=Avg('score'), low=Min('score')
+        ).order_by('team')
+        self.assertListEqual(list(rows), [('A', 15.0, 10), ('B', 5.0, 5)])
+
+        named = self.table.objects.values_list('team', named=True).annotate(n=Count())
+        self.assertEqual(named.first().n, 2)
+
+    def test_invalid_aggregates(self):
+        with self.assertRaises(ValueError):
+            self.table.objects.annotate(n=Count())
+        with self.assertRaises(ValueError):
+            self.table.objects.values_list('team', flat=True).annotate(n=Count())
+        with self.assertRaises(ValueError):
+            self.table.objects.values('team').annotate(team=Count())
+        with self.assertRaises(ValueError):
+            self.table.objects.aggregate(total=Sum('unknown'))
+        with self.assertRaises(ValueError):
+            Count('*', distinct=True)
+
+
+class TestBulkInsert(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'BulkInsertTesting',
+            {
+                'username': CharField(max_length=50),
+                'age': IntegerField(default=18)
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+
+    def setUp(self):
+        self.table.objects.delete()
+
+    def test_bulk_insert_returns_records_with_pks(self):
+        rows = [{'username': f'User{index}', 'age': index} for index in range(25)]
+        records = self.table.objects.bulk_insert(rows, batch_size=10)
+
+        self.assertEqual(len(records), 25)
+        self.assertEqual(self.table.objects.count(), 25)
+        for record in records:
+            stored = self.table.objects.select(id=record.pk).first()
+            self.assertDictEqual(stored.attrs, record.attrs)
+
+    def test_bulk_insert_without_records(self):
+        inserted = self.table.bulk_create(
+            [{'username': 'User1'}, {'age': 40, 'username': 'User2'}],
+            return_records=False
+        )
+        self.assertEqual(inserted, 2)
+        self.assertEqual(self.table.objects.select(username='User1').first().age, 18)
+
+    def test_bulk_insert_validates_rows_before_writing(self):
+        rows = [{'username': 'User1'}, {'username': None}]
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_insert(rows)
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_insert([{'username': 'User1', 'unknown': 1}])
+        self.assertEqual(self.table.objects.count(), 0)
+
+
+class TestBulkUpdateAndDelete(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'BulkUpdateTesting',
+            {
+                'username': CharField(max_length=50),
+                'age': IntegerField(default=18)
+            }
+        )
+        cls.create_tables_on_db([cls.table])
+
+    def setUp(self):
+        self.table.objects.delete()
+        self.records = self.table.bulk_create(
+            [{'username': f'User{index}', 'age': index} for index in range(25)]
+        )
+
+    def test_bulk_update_sets_per_record_values(self):
+        for record in self.records:
+            record.age += 100
+            record.username = record.username.upper()
+
+        updated = self.table.objects.bulk_update(
+            self.records, fields=['age'], batch_size=10
+        )
+        self.assertEqual(updated, 25)
+        for record in self.records:
+            stored = self.table.objects.select(id=record.pk).first()
+            self.assertEqual(stored.age, record.age)
+            self.assertEqual(stored.username, record.username.capitalize())
+
+    def test_bulk_update_respects_queryset_filters(self):
+        for record in self.records:
+            record.age = 0
+        updated = self.table.objects.filter(age__lt=5).bulk_update(
+            self.records, ['age']
+        )
+        self.assertEqual(updated, 5)
+        self.assertEqual(self.table.objects.count(age=0), 5)
+
+    def test_bulk_update_validates_fields(self):
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_update(self.records, ['unknown'])
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_update(self.records, ['id'])
+
+        self.records[-1].username = None
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_update(self.records, ['username'])
+        self.assertEqual(self.table.objects.count(username='User24'), 1)
+
+    def test_bulk_delete_in_chunks(self):
+        pks = [record.pk for record in self.records[:20]]
+        deleted = self.table.objects.bulk_delete(pks, batch_size=7)
+        self.assertEqual(deleted, 20)
+        self.assertEqual(self.table.objects.count(), 5)
+
+        deleted = self.table.objects.filter(age__ge=23).bulk_delete(self.records)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(self.table.objects.count(), 3)
+
+
+class TestUpsert(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = cls.create_table(
+            'UpsertTesting',
+            {
+                'username': CharField(max_length=50, unique=True),
+                'age': IntegerField(default=18)
+            }
+        )
+        cls.notes_table = cls.create_table(
+            'UpsertNotes', {'note': TextField(null=True, default='x')}
+        )
+        cls.create_tables_on_db([cls.table, cls.notes_table])
+
+    def setUp(self):
+        self.table.objects.delete()
+        self.record = self.table.create(username='User1', age=20)
+
+    def count_statements(self, function):
+        statements = []
+        self.db._conn.set_trace_callback(statements.append)
+        try:
+            function()
+        finally:
+            self.db._conn.set_trace_callback(None)
+        return statements
+
+    def test_upsert_inserts_and_updates(self):
+        changed = self.table.objects.upsert(
+            [{'username': 'User1', 'age': 21}, {'username': 'User2', 'age': 30}],
+            conflict_target=['username']
+        )
+        self.assertEqual(changed, 2)
+        self.assertEqual(self.table.objects.count(), 2)
+        updated = self.table.objects.select(username='User1').first()
+        self.assertEqual(updated.pk, self.record.pk)
+        self.assertEqual(updated.age, 21)
+
+    def test_upsert_keeps_columns_missing_from_rows(self):
+        self.table.objects.update({'age': 40}, pk=self.record.pk)
+        self.table.objects.upsert(
+            [{'username': 'User1'}, {'username': 'User2'}],
+            conflict_target=['username']
+        )
+        self.assertEqual(self.table.objects.select(username='User1').first().age, 40)
+        self.assertEqual(self.table.objects.select(username='User2').first().age, 18)
+
+    def test_upsert_with_update_fields(self):
+        self.table.objects.upsert(
+            [{'username': 'User1', 'age': 21}],
+            conflict_target=['username'],
+            update_fields=[]
+        )
+        self.assertEqual(self.table.objects.select(username='User1').first().age, 20)
+
+        with self.assertRaises(ValueError):
+            self.table.objects.upsert(
+                [{'username': 'User1'}], conflict_target=['unknown']
+            )
+
+    def test_save_uses_a_single_statement(self):
+        self.record.age = 40
+        statements = self.count_statements(self.record.save)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('ON CONFLICT (id) DO UPDATE', statements[0])
+        self.assertEqual(self.table.objects.first().age, 40)
+
+    def test_save_new_record_sets_pk(self):
+        record = self.table._record_class(username='User2')
+        record.save()
+        self.assertIsNotNone(record.pk)
+        self.assertEqual(record.age, 18)
+        self.assertDictEqual(
+            self.table.objects.select(pk=record.pk).first().attrs,
+            record.attrs
+        )
+
+    def test_save_new_record_keeps_explicit_none(self):
+        record = self.notes_table._record_class(note=None).save()
+        self.assertIsNone(self.notes_table.objects.get(record.pk).note)
+
+        record = self.notes_table._record_class().save()
+        self.assertEqual(record.note, 'x')
+        self.assertEqual(self.notes_table.objects.get(record.pk).note, 'x')
+
+    def test_save_reinserts_deleted_record(self):
+        self.assertEqual(self.record.delete(), 1)
+        statements = self.count_statements(self.record.save)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(self.table.objects.select(pk=self.record.pk).count(), 1)
+
+    def test_get(self):
+        self.assertDictEqual(
+            self.table.objects.get(self.record.pk).attrs, self.record.attrs
+        )
+        statements = self.count_statements(
+            lambda: self.table.objects.get(self.record.pk)
+        )
+        self.assertEqual(statements, [
+            f'SELECT * FROM upserttesting WHERE id = {self.record.pk} LIMIT 1;'
+        ])
+        self.assertEqual(
+            self.table.objects.filter(age=20).get(self.record.pk).username, 'User1'
+        )
+        self.assertDictEqual(
+            self.table.objects.values('username').get(self.record.pk),
+            {'username': 'User1'}
+        )
+        with self.assertRaises(LookupError):
+            self.table.objects.get(self.record.pk + 1)
+        with self.assertRaises(LookupError):
+            self.table.objects.filter(age=21).get(self.record.pk)
+
+    def test_bulk_insert_rejects_mixed_fields(self):
+        rows = [{'username': 'User1', 'id': 100}, {'username': 'User2'}]
+        with self.assertRaises(ValueError):
+            self.table.objects.bulk_insert(rows)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+from tests.fixtures import TestCaseWithTables
+from tiny_sqlite_orm import CharField, ForeignKeyField
+
+
+class TestEagerLoading(TestCaseWithTables):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.country = cls.create_table(
+            'RelatedCountry',
+            {'name': CharField(max_length=50)}
+        )
+        cls.customer = cls.create_table(
+            'RelatedCustomer',
+            {
+                'name': CharField(max_length=50),
+                'country': ForeignKeyField(cls.country)
+            }
+        )
+        cls.order = cls.create_table(
+            'RelatedOrder',
+            {
+                'code': CharField(max_length=50),
+                'customer': ForeignKeyField(cls.customer)
+            }
+        )
+        cls.create_tables_on_db([cls.order, cls.customer, cls.country])
+
+        brazil = cls.country.create(name='Brazil')
+        customers = [
+            cls.customer.create(name=f'Customer{index}', country=brazil)
+            for index in range(3)
+        ]
+        cls.order.bulk_create([
+            {'code': f'Order{index}', 'customer': customers[index % 3]}
+            for index in range(9)
+        ])
+
+    def setUp(self):
+        self.statements = []
+        self.db._conn.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        self.db._conn.set_trace_callback(None)
+
+    def test_select_related_uses_a_single_join(self):
+        orders = list(self.order.objects.select_related('customer').order_by('code'))
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn('LEFT JOIN relatedcustomer AS t1', self.statements[0])
+        self.assertEqual(orders[4].customer.name, 'Customer1')
+        self.assertIs(orders[4].customer, orders[1].customer)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_select_related_follows_chains(self):
+        query = self.order.objects.select_related('customer__country').filter(code='Order2')
+        self.assertEqual(
+            str(query),
+            'SELECT relatedorder.*, t1.*, t2.* FROM relatedorder '
+            'LEFT JOIN relatedcustomer AS t1 ON t1.id = relatedorder.customer '
+            'LEFT JOIN relatedcountry AS t2 ON t2.id = t1.country '
+            'WHERE relatedorder.code = ?;'
+        )
+
+        order = query.first()
+        self.assertEqual(order.customer.name, 'Customer2')
+        self.assertEqual(order.customer.country.name, 'Brazil')
+        self.assertEqual(len(self.statements), 1)
+
+    def test_deferred_fields_with_related_loading(self):
+        query = self.order.objects.only('code').select_related('customer')
+        self.assertTrue(str(query).startswith(
+            'SELECT relatedorder.code, relatedorder.customer, relatedorder.id, t1.*'
+        ))
+        order = query.order_by('code').first()
+        self.assertEqual(order.customer.name, 'Customer0')
+
+        orders = list(
+            self.order.objects.defer('customer', 'code').prefetch_related('customer')
+        )
+        self.assertEqual(orders[0].customer.name, 'Customer0')
+        self.assertEqual(len(self.statements), 3)
+
+    def test_prefetch_related_batches_lookups(self):
+        orders = list(
+            self.order.objects.prefetch_related('customer__country').order_by('code')
+        )
+
+        self.assertEqual(len(self.statements), 3)
+        self.assertIn('IN (1, 2, 3)', self.statements[1])
+        self.assertEqual(orders[8].customer.name, 'Customer2')
+        self.assertEqual(orders[8].customer.country.name, 'Brazil')
+        self.assertEqual(len(self.statements), 3)
+
+    def test_prefetch_related_runs_once_for_the_whole_result(self):
+        queryset = self.order.objects.prefetch_related('customer').order_by('code')
+        orders = list(queryset.iterator(chunk_size=2))
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual(orders[8].customer.name, 'Customer2')
+
+        self.statements.clear()
+        queryset = self.order.objects.prefetch_related('customer__country')
+        queryset.prefetch_batch_size = 2
+        orders = list(queryset)
+        self.assertEqual(len(self.statements), 5)
+        self.assertEqual(
+            {order.customer.country.name for order in orders}, {'Brazil'}
+        )
+        self.assertEqual(len(self.statements), 5)
+
+    def test_foreign_keys_are_lazy_references(self):
+        orders = list(self.order.objects.order_by('code'))
+        self.assertEqual(len(self.statements), 1)
+
+        self.assertEqual(orders[0].customer_id, orders[0].customer.pk)
+        self.assertEqual(orders[5].customer_id, orders[2].customer_id)
+        self.assertEqual(len(self.statements), 1)
+
+        self.assertEqual(orders[0].customer.name, 'Customer0')
+        self.assertEqual(len(self.statements), 2)
+
+    def test_identity_map_shares_records_within_a_query(self):
+        orders = list(self.order.objects.order_by('code'))
+        self.assertIs(orders[0].customer, orders[3].customer)
+        self.assertIsNot(orders[0].customer, orders[1].customer)
+
+        orders[0].customer.name
+        orders[3].customer.name
+        self.assertEqual(len(self.statements), 2)
+        self.assertIs(orders[0].customer.record, orders[3].customer.record)
+
+    def test_reference_can_be_used_as_value(self):
+        order = self.order.objects.filter(code='Order1').first()
+        same_customer = self.order.objects.filter(customer=order.customer)
+        self.assertEqual(same_customer.count(), 3)
+        self.assertEqual(order.customer, order.customer.record)
+
+    def test_only_foreign_keys_can_be_related(self):
+        with self.assertRaises(ValueError):
+            self.order.objects.select_related('code')
+        with self.assertRaises(ValueError):
+            self.order.objects.prefetch_related('customer__name')
+
+
+if __name__ == '__main__':
+    unittest.main()
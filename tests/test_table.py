@@ -1,6 +1,12 @@
 import unittest
+from unittest.mock import patch
 from tests.fixtures import TestCaseWithTables
-from tiny_sqlite_orm import TextField
+from datetime import date
+from tiny_sqlite_orm import (
+    TextField, IntegerField, FloatField, BooleanField, DateField,
+    ForeignKeyField, Index
+)
+from tiny_sqlite_orm.record import RecordReference
 
 
 unittest.TestLoader.sortTestMethodsUsing = None
@@ -18,9 +24,51 @@ class TestTable(TestCaseWithTables):
             name='WithId',
             fields={'username': TextField(unique=True)}
         )
+        cls.table_with_duplicates = cls.create_table(
+            name='WithDuplicates',
+            fields={
+                'username': TextField(),
+                'age': IntegerField(default=18)
+            }
+        )
+        cls.table_with_conversions = cls.create_table(
+            name='WithConversions',
+            fields={
+                'score': IntegerField(null=True),
+                'active': BooleanField(default=False),
+                'joined': DateField(null=True),
+            }
+        )
+        cls.table_with_numbers = cls.create_table(
+            name='WithNumbers',
+            fields={
+                'total': FloatField(default=0.0),
+                'name': TextField(null=True),
+                'count': IntegerField(default=0),
+            }
+        )
+        cls.table_with_indexes = cls.create_table(
+            name='WithIndexes',
+            fields={
+                'username': TextField(),
+                'email': TextField(),
+                'age': IntegerField(index=True),
+                'active': BooleanField(default=True),
+                'owner': ForeignKeyField(cls.table_with_id),
+                'indexes': [
+                    Index('username', '-age'),
+                    Index('lower(email)', unique=True, name='uniq_email'),
+                    Index('age', where='active = 1'),
+                ],
+            }
+        )
         cls.create_tables_on_db([
+            cls.table_with_indexes,
             cls.table_with_pk,
             cls.table_with_id,
+            cls.table_with_duplicates,
+            cls.table_with_conversions,
+            cls.table_with_numbers,
         ])
 
     def test_create_user_with_pk(self):
@@ -36,6 +84,184 @@ class TestTable(TestCaseWithTables):
         self.assertIsNotNone(user.id)
         self.assertEqual(user.username, 'User1')
 
+    def test_create_returns_the_inserted_duplicate(self):
+        first = self.table_with_duplicates.create(username='Dup')
+        second = self.table_with_duplicates.create(username='Dup')
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.age, 18)
+
+    def test_create_without_returning_support(self):
+        with patch.object(self.db, 'supports_returning', False):
+            first = self.table_with_duplicates.create(username='NoReturning')
+            second = self.table_with_duplicates.create(username='NoReturning')
+
+        self.assertEqual(second.pk, first.pk + 1)
+        self.assertDictEqual(
+            self.table_with_duplicates.objects.select(id=second.pk).first().attrs,
+            second.attrs
+        )
+
+    def test_create_without_returning_decodes_values(self):
+        owner = self.table_with_id.create(username='Owner')
+        rows = {
+            'username': 'User1', 'email': 'user1@x', 'age': 20,
+            'owner': owner.pk,
+        }
+        with patch.object(self.db, 'supports_returning', False):
+            created = self.table_with_indexes.create(**rows)
+            dated = self.table_with_conversions.create(joined='2024-05-01')
+
+        fetched = self.table_with_indexes.objects.get(created.pk)
+        self.assertIsInstance(created.owner, RecordReference)
+        self.assertEqual(created.owner, fetched.owner)
+        self.assertEqual(dated.joined, date(2024, 5, 1))
+
+    def test_bulk_create_decodes_values(self):
+        owner = self.table_with_id.create(username='BulkOwner')
+        records = self.table_with_indexes.bulk_create([
+            {'username': 'Bulk1', 'email': 'bulk1@x', 'age': 1, 'owner': owner.pk},
+            {'username': 'Bulk2', 'email': 'bulk2@x', 'age': 2, 'owner': owner},
+        ])
+        for record in records:
+            fetched = self.table_with_indexes.objects.get(record.pk)
+            self.assertIsInstance(record.owner, RecordReference)
+            self.assertEqual(record.owner, fetched.owner)
+            self.assertDictEqual(
+                {**record.attrs, 'owner': record.owner_id},
+                {**fetched.attrs, 'owner': fetched.owner_id}
+            )
+
+        dated = self.table_with_conversions.bulk_create([{'joined': '2024-05-01'}])
+        self.assertEqual(dated[0].joined, date(2024, 5, 1))
+
+        rows = [{'total': 3, 'name': 5, 'count': '7'}, {'total': 1.5, 'name': 'x'}]
+        for record in self.table_with_numbers.bulk_create(rows):
+            fetched = self.table_with_numbers.objects.get(record.pk)
+            self.assertDictEqual(record.attrs, fetched.attrs)
+            self.assertIsInstance(record.total, float)
+            self.assertIsInstance(record.name, str)
+            self.assertIsInstance(record.count, int)
+
+    def test_written_rows_keep_field_types(self):
+        table = self.table_with_numbers
+        created = table.create(total=3, name=5, count='7')
+        self.assertEqual((created.total, created.name, created.count), (3.0, '5', 7))
+        self.assertIsInstance(created.total, float)
+        self.assertIsInstance(created.count, int)
+        self.assertIsInstance(table.create(total=3.0).total, float)
+
+        with patch.object(self.db, 'supports_returning', False):
+            created = table.create(total=3, name=5, count='7')
+        self.assertIsInstance(created.total, float)
+        self.assertEqual((created.name, created.count), ('5', 7))
+
+        record = table.bulk_create([{'total': 3, 'name': 5}])[0]
+        self.assertIsInstance(record.total, float)
+        self.assertEqual((record.total, record.name), (3.0, '5'))
+
+    def test_fields_are_cached(self):
+        table = self.table_with_conversions
+        self.assertTupleEqual(
+            tuple(field._name for field in table.get_fields()),
+            ('score', 'active', 'joined', 'id')
+        )
+        self.assertIs(table._get_field('active'), table.active)
+        self.assertIs(table._get_field('pk'), table.id)
+
+    def test_metadata(self):
+        meta = self.table_with_conversions._meta
+        self.assertTupleEqual(meta.columns, ('score', 'active', 'joined', 'id'))
+        self.assertEqual(meta.column_index['joined'], 2)
+        self.assertIs(meta.pk, self.table_with_conversions.id)
+        self.assertEqual(meta.pk_index, 3)
+        self.assertTupleEqual(meta.insert_columns, ('score', 'active', 'joined'))
+        self.assertEqual(
+            meta.insert_sql,
+            'INSERT INTO withconversions (score, active, joined) VALUES (?, ?, ?)'
+        )
+        self.assertEqual(
+            meta.upsert_sql,
+            'INSERT INTO withconversions (score, active, joined, id) '
+            'VALUES (?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET '
+            'score = excluded.score, active = excluded.active, '
+            'joined = excluded.joined;'
+        )
+        self.assertEqual(meta.delete_sql, 'DELETE FROM withconversions WHERE id = ?;')
+        self.assertEqual(
+            meta.select_sql, 'SELECT * FROM withconversions WHERE id = ? LIMIT 1;'
+        )
+        self.assertTupleEqual(
+            self.table_with_indexes._meta.foreign_keys,
+            (self.table_with_indexes.owner,)
+        )
+
+    def test_metadata_is_read_only(self):
+        meta = self.table_with_conversions._meta
+        with self.assertRaises(AttributeError):
+            meta.columns = ()
+        with self.assertRaises(AttributeError):
+            del meta.pk
+        with self.assertRaises(TypeError):
+            meta.column_index['score'] = 1
+        with self.assertRaises(AttributeError):
+            meta.extra = True
+
+    def test_row_decoder_converts_only_when_needed(self):
+        table = self.table_with_conversions
+        record = table._decode_row((None, 1, '2024-05-01', 7))
+        self.assertIsNone(record.score)
+        self.assertIs(record.active, True)
+        self.assertEqual(record.joined, date(2024, 5, 1))
+        self.assertEqual(record.pk, 7)
+
+        created = table.create(score=None, active=True)
+        self.assertDictEqual(
+            table.objects.select(id=created.pk).first().attrs,
+            {'score': None, 'active': True, 'joined': None, 'id': created.pk}
+        )
+
+    def test_indexes_schema(self):
+        self.assertTupleEqual(self.table_with_indexes._indexes_schema, (
+            'CREATE INDEX IF NOT EXISTS idx_withindexes_username_age_desc '
+            'ON withindexes (username, age DESC);',
+            'CREATE UNIQUE INDEX IF NOT EXISTS uniq_email '
+            'ON withindexes (lower(email));',
+            'CREATE INDEX IF NOT EXISTS idx_withindexes_age_where_active_1 '
+            'ON withindexes (age) WHERE active = 1;',
+            'CREATE INDEX IF NOT EXISTS idx_withindexes_age '
+            'ON withindexes (age);',
+            'CREATE INDEX IF NOT EXISTS idx_withindexes_owner '
+            'ON withindexes (owner);',
+        ))
+
+    def test_indexes_are_created_idempotently(self):
+        self.db.create_tables_if_not_exists([self.table_with_indexes])
+        names = {
+            row[0] for row in self.db._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'withindexes' AND sql IS NOT NULL;"
+            )
+        }
+        self.assertSetEqual(names, {
+            'idx_withindexes_username_age_desc',
+            'uniq_email',
+            'idx_withindexes_age_where_active_1',
+            'idx_withindexes_age',
+            'idx_withindexes_owner',
+        })
+
+        plan = self.db._conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM withindexes WHERE owner = ?;', (1,)
+        ).fetchall()
+        self.assertIn('idx_withindexes_owner', plan[0][-1])
+
+    def test_index_on_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.create_table(
+                name='WithBadIndex',
+                fields={'name': TextField(), 'indexes': [Index('missing')]}
+            )
+
     def test_primary_key(self):
         self.assertIs(self.table_with_pk.pk, self.table_with_pk.username)
         self.assertIs(self.table_with_id.pk, self.table_with_id.id)
@@ -1,3 +1,6 @@
 from .database import Database # noqa F401
+from .async_database import AsyncDatabase # noqa F401
 from .table import Table # noqa F401
 from .field import * # noqa F403
+from .index import Index # noqa F401
+from .aggregates import Count, Sum, Avg, Max, Min # noqa F401
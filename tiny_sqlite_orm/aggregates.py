@@ -0,0 +1,46 @@
+class Aggregate:
+
+    function = None
+
+    def __init__(self, column, distinct=False):
+        if column == '*' and distinct:
+            raise ValueError(f'{self.function}(DISTINCT *) is not valid SQL')
+
+        self.column = column
+        self.distinct = distinct
+
+    def compile(self, table):
+        column = self.column
+        if column != '*':
+            column = table._get_column_name(column)
+
+        distinct = 'DISTINCT ' if self.distinct else ''
+        return f'{self.function}({distinct}{column})'
+
+
+class Count(Aggregate):
+
+    function = 'COUNT'
+
+    def __init__(self, column='*', distinct=False):
+        super().__init__(column, distinct)
+
+
+class Sum(Aggregate):
+
+    function = 'SUM'
+
+
+class Avg(Aggregate):
+
+    function = 'AVG'
+
+
+class Max(Aggregate):
+
+    function = 'MAX'
+
+
+class Min(Aggregate):
+
+    function = 'MIN'
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import partial
+from .database import Database
+
+
+class AsyncDatabase(Database):
+
+    is_async = True
+
+    def __init__(self, database_name, *args, **kwargs):
+        self.__thread_id = None
+        self.__transaction_lock = None
+        self.__transaction_lock_loop = None
+        self.__in_transaction = ContextVar('in_transaction', default=False)
+        self.__executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='tiny_sqlite_orm',
+            initializer=self.__set_thread_id
+        )
+        super().__init__(database_name, *args, **kwargs)
+
+    def __set_thread_id(self):
+        self.__thread_id = threading.get_ident()
+
+    def __on_executor(self):
+        return self.__thread_id == threading.get_ident()
+
+    @staticmethod
+    def __in_running_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _run(self, function, *args, **kwargs):
+        if self.__on_executor():
+            return function(*args, **kwargs)
+
+        if not self.__in_running_loop():
+            return self._call(function, *args, **kwargs)
+        return self.__run_outside_transactions(function, *args, **kwargs)
+
+    async def __run_outside_transactions(self, function, *args, **kwargs):
+        if self.__in_transaction.get():
+            return await self.__execute(function, *args, **kwargs)
+        async with self.__get_transaction_lock():
+            return await self.__execute(function, *args, **kwargs)
+
+    def __execute(self, function, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(
+            self.__executor, partial(function, *args, **kwargs)
+        )
+
+    def __get_transaction_lock(self):
+        loop = asyncio.get_running_loop()
+        if self.__transaction_lock_loop is not loop:
+            self.__transaction_lock = asyncio.Lock()
+            self.__transaction_lock_loop = loop
+        return self.__transaction_lock
+
+    def _call(self, function, *args, **kwargs):
+        if self.__on_executor():
+            return function(*args, **kwargs)
+        if self.__in_running_loop():
+            raise RuntimeError(
+                'Lazy loads would block the event loop of an AsyncDatabase; '
+                'use "await reference.load()" and select the fields you read'
+            )
+        return self.__executor.submit(function, *args, **kwargs).result()
+
+    @asynccontextmanager
+    async def transaction(self):
+        if self.__in_transaction.get():
+            async with self.__transaction():
+                yield self
+            return
+
+        async with self.__get_transaction_lock():
+            token = self.__in_transaction.set(True)
+            try:
+                async with self.__transaction():
+                    yield self
+            finally:
+                self.__in_transaction.reset(token)
+
+    @asynccontextmanager
+    async def __transaction(self):
+        transaction = self._transaction()
+        await self.__execute(transaction.__enter__)
+        try:
+            yield
+        except BaseException:
+            if not await self.__execute(transaction.__exit__, *sys.exc_info()):
+                raise
+        else:
+            await self.__execute(transaction.__exit__, None, None, None)
+
+    def commit(self):
+        return self._run(self._commit)
+
+    def rollback(self):
+        return self._run(self._rollback)
+
+    def get_pragmas(self):
+        return self._run(super().get_pragmas)
+
+    def _fetch(self, instruction, params=(), chunk_size=100, tables=()):
+        if not self.__on_executor():
+            raise RuntimeError(
+                'Querysets of an AsyncDatabase must be consumed with '
+                '"await" or "async for"'
+            )
+        return super()._fetch(instruction, params, chunk_size, tables)
+
+    def _close(self):
+        super()._close()
+        self.__executor.shutdown(wait=False)
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+
+    def __init__(self, max_size=256, ttl=None, max_rows=1000):
+        if max_size < 1:
+            raise ValueError('"query_cache_size" must be greater than 0')
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.__entries = OrderedDict()
+        self.__keys_by_table = {}
+        self.__generations = {}
+        self.__lock = threading.Lock()
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.__is_expired(entry):
+                self.__remove(key)
+                entry = None
+
+            if entry is None:
+                self.__stats['misses'] += 1
+                return False, None
+
+            self.__entries.move_to_end(key)
+            self.__stats['hits'] += 1
+            return True, entry[0]
+
+    def __is_expired(self, entry):
+        return entry[1] is not None and entry[1] <= time.monotonic()
+
+    def generation(self, tables):
+        with self.__lock:
+            return tuple(self.__generations.get(table, 0) for table in tables)
+
+    def set(self, key, value, tables, generation):
+        with self.__lock:
+            if generation != tuple(
+                self.__generations.get(table, 0) for table in tables
+            ):
+                return
+
+            expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+            self.__remove(key)
+            self.__entries[key] = (value, expires_at, tables)
+            for table in tables:
+                self.__keys_by_table.setdefault(table, set()).add(key)
+
+            while len(self.__entries) > self.max_size:
+                self.__remove(next(iter(self.__entries)))
+                self.__stats['evictions'] += 1
+
+    def __remove(self, key):
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[2]:
+            keys = self.__keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate(self, tables):
+        with self.__lock:
+            for table in tables:
+                self.__generations[table] = self.__generations.get(table, 0) + 1
+                keys = self.__keys_by_table.pop(table, set())
+                for key in keys:
+                    self.__remove(key)
+                self.__stats['invalidations'] += len(keys)
+
+    def clear(self):
+        with self.__lock:
+            for table in {*self.__keys_by_table, *self.__generations}:
+                self.__generations[table] = self.__generations.get(table, 0) + 1
+            self.__entries.clear()
+            self.__keys_by_table.clear()
+
+    def stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats['size'] = len(self.__entries)
+            stats['max_size'] = self.max_size
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
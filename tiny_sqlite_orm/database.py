@@ -1,18 +1,504 @@
+import re
 import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+from .cache import QueryCache
+from .explain import IndexAdvisor, QueryPlan
+from .instrumentation import Instrumentation, QueryCounter
+from .pool import ConnectionPool
+
+
+WRITTEN_TABLE_PATTERN = re.compile(
+    r'^\s*(?:INSERT INTO|UPDATE|DELETE FROM)\s+(\w+)', re.IGNORECASE
+)
+
+
+def run_on_database(method):
+    @wraps(method)
+    def run(self, *args, **kwargs):
+        return self.table.db._run(method, self, *args, **kwargs)
+    return run
 
 
 class Database:
 
-    def __init__(self, database_name):
-        self._conn = sqlite3.connect(database_name)
-        self.__set_foreign_keys()
+    supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+    is_async = False
+    cached_statements = 1024
+
+    profiles = {
+        'default': {},
+        'throughput': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+        'durable': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+        },
+        'readonly': {
+            'query_only': 'ON',
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+    }
+
+    def __init__(self, database_name, autocommit=True, pool_size=None,
+                 pool_timeout=5.0, profile='default', pragmas=None,
+                 query_cache_size=None, query_cache_ttl=None,
+                 slow_query_threshold=None, collect_query_stats=False):
+        self.database_name = database_name
+        self.autocommit = autocommit
+        self.pragmas = self.__get_pragmas(profile, pragmas, pool_size)
+        self.__savepoints = 0
+        self.__holds_writer = False
+        self.__pooled = pool_size is not None
+        self._pool = None
+        self._tables = {}
+        self._query_cache = None
+        self.__dirty_tables = set()
+        self._instrumentation = Instrumentation(
+            slow_query_threshold, collect_query_stats
+        )
+        self.__index_advisor = None
+        self.__index_advisor_hook = None
+
+        if query_cache_size is not None:
+            self._query_cache = QueryCache(query_cache_size, query_cache_ttl)
+
+        if not self.__pooled:
+            self._conn = self._connect()
+            return
+
+        if database_name == ':memory:':
+            raise ValueError('Connection pooling requires a file-backed database')
+        self._pool = ConnectionPool(self._connect, pool_size, pool_timeout)
+        self._conn = self._pool.writer
+
+    def __get_pragmas(self, profile, overrides, pool_size):
+        if profile not in self.profiles:
+            raise ValueError(f'Unknown database profile "{profile}"')
+
+        pragmas = {'foreign_keys': 'ON'}
+        if pool_size is not None:
+            pragmas['journal_mode'] = 'WAL'
+        pragmas.update(self.profiles[profile])
+        pragmas.update(overrides or {})
+
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not str(value).lstrip('-').isalnum():
+                raise ValueError(f'Invalid pragma "{name} = {value}"')
+        return pragmas
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(
+            self.database_name,
+            isolation_level=None,
+            check_same_thread=not (self.__pooled or self.is_async),
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value};')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON;')
+        return conn
+
+    def get_pragmas(self):
+        with self.__writing() as conn:
+            return {
+                name: conn.execute(f'PRAGMA {name};').fetchone()[0]
+                for name in self.pragmas
+            }
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def pool_stats(self):
+        if self._pool is None:
+            return {}
+        return self._pool.stats()
+
+    def query_cache_stats(self):
+        if self._query_cache is None:
+            return {}
+        return self._query_cache.stats()
+
+    def clear_query_cache(self):
+        if self._query_cache is not None:
+            self._query_cache.clear()
+
+    def add_query_hook(self, before=None, after=None):
+        return self._instrumentation.add_hook(before, after)
+
+    def remove_query_hook(self, hook):
+        self._instrumentation.remove_hook(hook)
+
+    @contextmanager
+    def count_queries(self):
+        counter = QueryCounter()
+        self._instrumentation.add_counter(counter)
+        try:
+            yield counter
+        finally:
+            self._instrumentation.remove_counter(counter)
+
+    def set_slow_query_threshold(self, seconds):
+        self._instrumentation.set_slow_query_threshold(seconds)
+
+    @property
+    def slow_queries(self):
+        return list(self._instrumentation.slow_queries)
+
+    def collect_query_stats(self, enabled=True):
+        self._instrumentation.set_collect_stats(enabled)
+
+    def query_stats(self):
+        return self._instrumentation.stats()
+
+    def reset_query_stats(self):
+        self._instrumentation.reset_stats()
+
+    def start_index_advisor(self):
+        if self.__index_advisor_hook is None:
+            self.__index_advisor = IndexAdvisor(self)
+            self.__index_advisor_hook = self.add_query_hook(
+                after=self.__index_advisor.record
+            )
+
+    def stop_index_advisor(self):
+        if self.__index_advisor_hook is not None:
+            self.remove_query_hook(self.__index_advisor_hook)
+            self.__index_advisor_hook = None
+
+    def advise_indexes(self):
+        if self.__index_advisor is None:
+            raise RuntimeError('Call "start_index_advisor" before "advise_indexes"')
+        return self._run(self.__index_advisor.advise)
+
+    def _explain(self, instruction, params=()):
+        with self.__reading() as conn:
+            rows = conn.execute(f'EXPLAIN QUERY PLAN {instruction}', params).fetchall()
+        return QueryPlan(instruction, params, rows)
+
+    def _get_indexes(self, table_name):
+        with self.__reading() as conn:
+            names = [
+                row[1] for row in conn.execute(f'PRAGMA index_list({table_name});')
+            ]
+            return [
+                tuple(
+                    row[2] for row in conn.execute(f'PRAGMA index_info({name});')
+                )
+                for name in names
+            ]
+
+    def transaction(self):
+        return self._transaction()
+
+    @contextmanager
+    def _transaction(self):
+        with self.__writing():
+            if self.in_transaction:
+                with self.__savepoint():
+                    yield self
+                return
+
+            self._conn.execute('BEGIN;')
+            try:
+                yield self
+            except BaseException:
+                self._rollback()
+                raise
+            self._commit()
+
+    @contextmanager
+    def __savepoint(self):
+        self.__savepoints += 1
+        name = f'tiny_sqlite_orm_{self.__savepoints}'
+        self._conn.execute(f'SAVEPOINT {name};')
+        try:
+            yield
+        except BaseException:
+            self._conn.execute(f'ROLLBACK TO {name};')
+            self._conn.execute(f'RELEASE {name};')
+            self.__invalidate_dirty_tables(keep=True)
+            raise
+        else:
+            self._conn.execute(f'RELEASE {name};')
+        finally:
+            self.__savepoints -= 1
+
+    def commit(self):
+        return self._commit()
+
+    def _commit(self):
+        if self.in_transaction:
+            self._conn.execute('COMMIT;')
+        self.__invalidate_dirty_tables()
+        self.__release_held_writer()
 
-    def __set_foreign_keys(self):
-        self._conn.execute('PRAGMA foreign_keys = ON;')
+    def rollback(self):
+        return self._rollback()
+
+    def _rollback(self):
+        if self.in_transaction:
+            self._conn.execute('ROLLBACK;')
+        self.__invalidate_dirty_tables()
+        self.__release_held_writer()
+
+    @contextmanager
+    def __writing(self):
+        if self._pool is None:
+            yield self._conn
+            return
+
+        with self._pool.writing() as conn:
+            yield conn
+
+    @contextmanager
+    def __reading(self):
+        if self._pool is None or self._pool.owns_writer():
+            yield self._conn
+            return
+
+        with self._pool.reader() as conn:
+            yield conn
+
+    def _run(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    def _call(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    def __uses_cache(self, tables):
+        if self._query_cache is None or not tables:
+            return False
+        if self._pool is None or not self._pool.owns_writer():
+            return True
+        # Reads served by the writer would see its uncommitted changes
+        return not self._conn.in_transaction
+
+    def _fetch_one(self, instruction, params=(), tables=()):
+        if not self.__uses_cache(tables):
+            return self.__fetch_one(instruction, params, tables)
+
+        key = (instruction, params)
+        found, row = self._query_cache.get(key)
+        if not found:
+            generation = self._query_cache.generation(tables)
+            row = self.__fetch_one(instruction, params, tables)
+            self._query_cache.set(key, row, tables, generation)
+        return row
+
+    def __fetch_one(self, instruction, params, tables):
+        with self.__reading() as conn:
+            if not self._instrumentation.enabled:
+                return conn.execute(instruction, params).fetchone()
+
+            self._instrumentation.before(instruction, params)
+            started = time.perf_counter()
+            row = conn.execute(instruction, params).fetchone()
+            self.__after_query(
+                instruction, params, tables,
+                time.perf_counter() - started, 0 if row is None else 1
+            )
+            return row
+
+    def __after_query(self, instruction, params, tables, duration, rows):
+        if tables:
+            table = tables[0]
+        else:
+            match = WRITTEN_TABLE_PATTERN.match(instruction)
+            table = match and match.group(1).lower()
+        self._instrumentation.after(instruction, params, table, duration, rows)
+
+    def _fetch(self, instruction, params=(), chunk_size=100, tables=()):
+        if not self.__uses_cache(tables):
+            return self.__fetch(instruction, params, chunk_size, tables)
+        return self.__fetch_with_cache(instruction, params, chunk_size, tables)
+
+    def __fetch_with_cache(self, instruction, params, chunk_size, tables):
+        key = (instruction, params)
+        found, rows = self._query_cache.get(key)
+        if found:
+            yield from self.__split_in_chunks(rows, chunk_size)
+            return
+
+        generation = self._query_cache.generation(tables)
+        rows = []
+        chunks = self.__fetch(instruction, params, chunk_size, tables)
+        for chunk in chunks:
+            rows.extend(chunk)
+            if len(rows) > self._query_cache.max_rows:
+                yield from self.__split_in_chunks(rows, chunk_size)
+                yield from chunks
+                return
+
+        rows = tuple(rows)
+        self._query_cache.set(key, rows, tables, generation)
+        yield from self.__split_in_chunks(rows, chunk_size)
+
+    @staticmethod
+    def __split_in_chunks(rows, chunk_size):
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    def __fetch(self, instruction, params, chunk_size, tables):
+        if self._instrumentation.enabled:
+            yield from self.__fetch_instrumented(
+                instruction, params, chunk_size, tables
+            )
+            return
+
+        with self.__reading() as conn:
+            cursor = conn.execute(instruction, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cursor.close()
+
+    def __fetch_instrumented(self, instruction, params, chunk_size, tables):
+        self._instrumentation.before(instruction, params)
+        duration = 0.0
+        fetched = 0
+        with self.__reading() as conn:
+            started = time.perf_counter()
+            cursor = conn.execute(instruction, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    duration += time.perf_counter() - started
+                    if not rows:
+                        return
+                    fetched += len(rows)
+                    yield rows
+                    started = time.perf_counter()
+            finally:
+                cursor.close()
+                self.__after_query(instruction, params, tables, duration, fetched)
+
+    def _execute_schema(self, instruction):
+        with self.__writing() as conn:
+            self.__execute(conn.execute, instruction, ())
+        self.clear_query_cache()
+
+    def _execute_write(self, instruction, params=()):
+        with self.__writing() as conn:
+            self.__begin_if_not_autocommit()
+            try:
+                return self.__execute(conn.execute, instruction, params)
+            finally:
+                self.__invalidate_written_tables(instruction)
+
+    def _execute_returning(self, instruction, params=()):
+        with self.__writing() as conn:
+            self.__begin_if_not_autocommit()
+            try:
+                return self.__execute(conn.execute, instruction, params).fetchone()
+            finally:
+                self.__invalidate_written_tables(instruction)
+
+    def _executemany_write(self, instruction, seq_of_params):
+        with self.__writing() as conn:
+            self.__begin_if_not_autocommit()
+            try:
+                return self.__execute(
+                    conn.executemany, instruction, seq_of_params, many=True
+                )
+            finally:
+                self.__invalidate_written_tables(instruction)
+
+    def __execute(self, execute, instruction, params, many=False):
+        if not self._instrumentation.enabled:
+            return execute(instruction, params)
+
+        hook_params = None if many else params
+        self._instrumentation.before(instruction, hook_params)
+        started = time.perf_counter()
+        cursor = execute(instruction, params)
+        self.__after_query(
+            instruction, hook_params, (),
+            time.perf_counter() - started, cursor.rowcount
+        )
+        return cursor
+
+    def __invalidate_written_tables(self, instruction):
+        if self._query_cache is None:
+            return
+
+        match = WRITTEN_TABLE_PATTERN.match(instruction)
+        if match is None:
+            return self._query_cache.clear()
+
+        tables = self.__get_dependent_tables(match.group(1).lower())
+        self._query_cache.invalidate(tables)
+        if self.in_transaction:
+            self.__dirty_tables.update(tables)
+
+    def __get_dependent_tables(self, table_name):
+        tables = {table_name}
+        changed = True
+        while changed:
+            changed = False
+            for name, table in self._tables.items():
+                if name in tables:
+                    continue
+                if any(
+                    field.ref_table.table_name in tables
+                    for field in table._meta.foreign_keys
+                ):
+                    tables.add(name)
+                    changed = True
+        return tables
+
+    def __invalidate_dirty_tables(self, keep=False):
+        if self._query_cache is None or not self.__dirty_tables:
+            return
+        self._query_cache.invalidate(self.__dirty_tables)
+        if not keep:
+            self.__dirty_tables = set()
+
+    def __begin_if_not_autocommit(self):
+        if not self.autocommit and not self.in_transaction:
+            self._conn.execute('BEGIN;')
+            self.__hold_writer()
+
+    def __hold_writer(self):
+        if self._pool is not None and not self.__holds_writer:
+            self._pool.acquire_writer()
+            self.__holds_writer = True
+
+    def __release_held_writer(self):
+        if self.__holds_writer:
+            self.__holds_writer = False
+            self._pool.release_writer()
 
     def create_tables_if_not_exists(self, tables):
+        return self._run(self.__create_tables, tables)
+
+    def __create_tables(self, tables):
         for table in tables:
             table._initialize_and_create_table(self)
+            self._tables[table.table_name] = table
 
     def disconnect(self):
-        self._conn.close()
+        return self._run(self._close)
+
+    def _close(self):
+        if self._pool is not None:
+            self._pool.close()
+        else:
+            self._conn.close()
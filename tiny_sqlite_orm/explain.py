@@ -0,0 +1,176 @@
+import re
+import threading
+from .index import Index
+
+
+STATEMENT_TABLE_PATTERN = re.compile(r'\b(?:FROM|UPDATE)\s+(\w+)', re.IGNORECASE)
+WHERE_PATTERN = re.compile(
+    r'\sWHERE\s(.*?)(?:\sGROUP BY\s|\sORDER BY\s|\sLIMIT\s|;|$)', re.DOTALL
+)
+CONDITION_PATTERN = re.compile(r'(?:(\w+)\.)?(\w+) (=|IN|<=|>=|<|>) ')
+NOT_PATTERN = re.compile(r'\bNOT \(')
+SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+
+
+class PlanNode:
+
+    def __init__(self, id, parent, detail):
+        self.id = id
+        self.parent = parent
+        self.detail = detail
+        self.children = []
+
+    @property
+    def is_full_scan(self):
+        return SCAN_PATTERN.match(self.detail) is not None
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def __repr__(self):
+        return f'PlanNode({self.detail!r})'
+
+
+class QueryPlan:
+
+    def __init__(self, sql, params, rows):
+        self.sql = sql
+        self.params = params
+        self.nodes = []
+        nodes = {}
+        for id, parent, _, detail in rows:
+            node = nodes[id] = PlanNode(id, parent, detail)
+            if parent in nodes:
+                nodes[parent].children.append(node)
+            else:
+                self.nodes.append(node)
+
+    def walk(self):
+        for node in self.nodes:
+            yield from node.walk()
+
+    @property
+    def full_scans(self):
+        return [
+            SCAN_PATTERN.match(node.detail).group(1)
+            for node in self.walk() if node.is_full_scan
+        ]
+
+    def __str__(self):
+        lines = []
+        for node in self.nodes:
+            self.__format(node, 0, lines)
+        return '\n'.join(lines)
+
+    def __format(self, node, depth, lines):
+        lines.append(f'{"  " * depth}{node.detail}')
+        for child in node.children:
+            self.__format(child, depth + 1, lines)
+
+    def __repr__(self):
+        return f'QueryPlan({self.sql!r})'
+
+
+class IndexAdvisor:
+
+    max_statements = 1000
+
+    def __init__(self, db):
+        self.db = db
+        self.__statements = {}
+        self.__lock = threading.Lock()
+
+    def record(self, event):
+        if event.params is None or ' WHERE ' not in event.sql:
+            return
+        with self.__lock:
+            is_full = len(self.__statements) >= self.max_statements
+            if not is_full and event.sql not in self.__statements:
+                self.__statements[event.sql] = event.params
+
+    def advise(self):
+        with self.__lock:
+            statements = list(self.__statements.items())
+
+        suggestions = {}
+        for sql, params in statements:
+            suggestion = self.__advise_statement(sql, params)
+            if suggestion is None:
+                continue
+            key = (suggestion['table'], suggestion['columns'])
+            if key in suggestions:
+                suggestions[key]['queries'].append(sql)
+            else:
+                suggestions[key] = suggestion
+        return list(suggestions.values())
+
+    def __advise_statement(self, sql, params):
+        match = STATEMENT_TABLE_PATTERN.search(sql)
+        table = match and self.db._tables.get(match.group(1).lower())
+        if table is None:
+            return None
+
+        plan = self.db._explain(sql, params)
+        if table.table_name not in plan.full_scans:
+            return None
+
+        columns = self.__get_indexable_columns(table, sql)
+        if not columns or self.__has_index(table, columns):
+            return None
+
+        index = Index(*columns)
+        return {
+            'table': table.table_name,
+            'columns': columns,
+            'sql': index._mount_schema(table),
+            'index': index,
+            'queries': [sql],
+        }
+
+    def __get_indexable_columns(self, table, sql):
+        match = WHERE_PATTERN.search(sql)
+        if match is None:
+            return ()
+
+        where = self.__strip_negations(match.group(1))
+        equalities, ranges = [], []
+        for qualifier, column, operator in CONDITION_PATTERN.findall(where):
+            if qualifier not in ('', table.table_name):
+                continue
+            if column not in table._meta.fields_by_name or column == 'rowid':
+                continue
+            found = equalities if operator in ('=', 'IN') else ranges
+            if column not in found:
+                found.append(column)
+
+        columns = equalities + [
+            column for column in ranges if column not in equalities
+        ][:1]
+        return tuple(columns)
+
+    @staticmethod
+    def __strip_negations(where):
+        while True:
+            match = NOT_PATTERN.search(where)
+            if match is None:
+                return where
+
+            depth = 0
+            end = len(where)
+            for index in range(match.end() - 1, len(where)):
+                if where[index] == '(':
+                    depth += 1
+                elif where[index] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        end = index + 1
+                        break
+            where = where[:match.start()] + where[end:]
+
+    def __has_index(self, table, columns):
+        for index_columns in self.db._get_indexes(table.table_name):
+            if index_columns[:len(columns)] == columns:
+                return True
+        return False
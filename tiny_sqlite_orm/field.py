@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from .record import Record
+from .record import Record, RecordReference
 from .utils import Utils
 
 
@@ -9,10 +9,12 @@ class Field:
     primary_key = False
     null = False
     unique = False
+    index = False
 
     _name = None
     _python_type = None
     _type = ''
+    _converts_sql_value = True
 
     __schema = None
 
@@ -81,6 +83,7 @@ class IntegerField(Field):
 
     _python_type = int
     _type = 'INTEGER'
+    _converts_sql_value = False
 
 
 class AutoField(IntegerField):
@@ -94,6 +97,7 @@ class FloatField(Field):
 
     _python_type = float
     _type = 'REAL'
+    _converts_sql_value = False
 
 
 class BooleanField(Field):
@@ -106,6 +110,7 @@ class TextField(Field):
 
     _python_type = str
     _type = 'TEXT'
+    _converts_sql_value = False
 
 
 class CharField(Field):
@@ -132,6 +137,8 @@ class CharField(Field):
 
 class DateField(TextField):
 
+    _converts_sql_value = True
+
     def __init__(self, auto_today=False, **options):
         if auto_today:
             options['default'] = date.today()
@@ -161,6 +168,8 @@ class DateField(TextField):
 
 class DatetimeField(TextField):
 
+    _converts_sql_value = True
+
     def __init__(self, auto_now=False, **options):
         if auto_now:
             options['default'] = datetime.now()
@@ -219,10 +228,18 @@ class ForeignKeyField(Field):
         )
 
     def _check_if_is_wrong_type(self, field):
-        if isinstance(field, Record):
+        if isinstance(field, (Record, RecordReference)):
             field = field.pk
         return super()._check_if_is_wrong_type(field)
 
-    def _convert_sql_value_to_python(self, value):
-        args = {self.ref_table.pk._name: value}
-        return self.ref_table.objects.select(**args).first()
+    def _convert_sql_value_to_python(self, value, identity_map=None):
+        if value is None:
+            return None
+
+        if identity_map is None:
+            return RecordReference(self.ref_table, value)
+
+        key = (self.ref_table, value)
+        if key not in identity_map:
+            identity_map[key] = RecordReference(self.ref_table, value)
+        return identity_map[key]
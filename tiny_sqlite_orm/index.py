@@ -0,0 +1,45 @@
+import re
+
+
+class Index:
+
+    def __init__(self, *columns, name=None, unique=False, where=None):
+        if not columns:
+            raise ValueError('Index requires at least one column or expression')
+
+        self.columns = columns
+        self.name = name
+        self.unique = unique
+        self.where = where
+
+    def _mount_schema(self, table):
+        columns = [self.__get_column(table, column) for column in self.columns]
+        name = self.name or self.__gen_name(table, columns)
+        unique = 'UNIQUE ' if self.unique else ''
+
+        schema = (
+            f'CREATE {unique}INDEX IF NOT EXISTS {name} '
+            f'ON {table.table_name} ({", ".join(columns)})'
+        )
+        if self.where:
+            schema += f' WHERE {self.where}'
+        return schema + ';'
+
+    @staticmethod
+    def __get_column(table, column):
+        name = column.lstrip('-')
+        if not name.isidentifier():
+            return column
+
+        column_name = table._get_column_name(name)
+        return f'{column_name} DESC' if column.startswith('-') else column_name
+
+    def __gen_name(self, table, columns):
+        parts = list(columns)
+        if self.where:
+            parts += ['where', self.where]
+        suffix = '_'.join(
+            re.sub(r'\W+', '_', part).strip('_').lower() for part in parts
+        )
+        prefix = 'uniq' if self.unique else 'idx'
+        return f'{prefix}_{table.table_name}_{suffix}'
@@ -0,0 +1,120 @@
+import logging
+import threading
+from collections import deque, namedtuple
+
+
+logger = logging.getLogger('tiny_sqlite_orm')
+
+QueryEvent = namedtuple('QueryEvent', 'sql params table duration rows')
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.events = []
+
+    @property
+    def statements(self):
+        return [event.sql for event in self.events]
+
+    def _add(self, event):
+        self.count += 1
+        self.total_time += event.duration
+        self.events.append(event)
+
+
+class Instrumentation:
+
+    def __init__(self, slow_query_threshold=None, collect_stats=False):
+        self.slow_query_threshold = slow_query_threshold
+        self.collect_stats = collect_stats
+        self.slow_queries = deque(maxlen=100)
+        self.__hooks = []
+        self.__counters = []
+        self.__stats = {}
+        self.__lock = threading.Lock()
+        self.__update_enabled()
+
+    def __update_enabled(self):
+        self.enabled = any((
+            self.__hooks,
+            self.__counters,
+            self.collect_stats,
+            self.slow_query_threshold is not None,
+        ))
+
+    def set_slow_query_threshold(self, seconds):
+        self.slow_query_threshold = seconds
+        self.__update_enabled()
+
+    def set_collect_stats(self, collect_stats):
+        self.collect_stats = collect_stats
+        self.__update_enabled()
+
+    def add_hook(self, before=None, after=None):
+        hook = (before, after)
+        self.__hooks = self.__hooks + [hook]
+        self.__update_enabled()
+        return hook
+
+    def remove_hook(self, hook):
+        self.__hooks = [item for item in self.__hooks if item is not hook]
+        self.__update_enabled()
+
+    def add_counter(self, counter):
+        self.__counters = self.__counters + [counter]
+        self.__update_enabled()
+
+    def remove_counter(self, counter):
+        self.__counters = [item for item in self.__counters if item is not counter]
+        self.__update_enabled()
+
+    def before(self, sql, params):
+        for before, _ in self.__hooks:
+            if before is not None:
+                before(sql, params)
+
+    def after(self, sql, params, table, duration, rows):
+        event = QueryEvent(sql, params, table, duration, rows)
+        for _, after in self.__hooks:
+            if after is not None:
+                after(event)
+        for counter in self.__counters:
+            counter._add(event)
+        if self.collect_stats:
+            self.__add_to_stats(event)
+        threshold = self.slow_query_threshold
+        if threshold is not None and event.duration >= threshold:
+            self.slow_queries.append(event)
+            logger.warning(
+                'Slow query (%.3fs, %s rows): %s %r',
+                event.duration, event.rows, event.sql, event.params
+            )
+        return event
+
+    def __add_to_stats(self, event):
+        with self.__lock:
+            stats = self.__stats.setdefault(event.table, {
+                'queries': 0,
+                'total_time': 0.0,
+                'max_time': 0.0,
+                'rows': 0,
+            })
+            stats['queries'] += 1
+            stats['total_time'] += event.duration
+            stats['max_time'] = max(stats['max_time'], event.duration)
+            stats['rows'] += max(event.rows or 0, 0)
+
+    def stats(self):
+        with self.__lock:
+            stats = {table: dict(values) for table, values in self.__stats.items()}
+
+        for values in stats.values():
+            values['avg_time'] = values['total_time'] / values['queries']
+        return stats
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__stats = {}
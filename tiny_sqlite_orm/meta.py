@@ -0,0 +1,70 @@
+from types import MappingProxyType
+from .field import AutoField, ForeignKeyField
+from .utils import Utils
+
+
+class TableMeta:
+
+    __slots__ = (
+        'table_name', 'fields', 'columns', 'fields_by_name', 'column_index',
+        'pk', 'pk_index', 'foreign_keys', 'insert_columns', 'insert_sql',
+        'upsert_sql', 'delete_sql', 'select_sql',
+    )
+
+    def __init__(self, table_name, fields, pk):
+        fields = tuple(fields)
+        columns = tuple(field._name for field in fields)
+        pk_name = pk._name
+
+        self.__set('table_name', table_name)
+        self.__set('fields', fields)
+        self.__set('columns', columns)
+        self.__set('fields_by_name', MappingProxyType(dict(zip(columns, fields))))
+        self.__set('column_index', MappingProxyType(
+            {column: index for index, column in enumerate(columns)}
+        ))
+        self.__set('pk', pk)
+        self.__set('pk_index', fields.index(pk))
+        self.__set('foreign_keys', tuple(
+            field for field in fields if isinstance(field, ForeignKeyField)
+        ))
+
+        insert_columns = tuple(
+            field._name for field in fields if not isinstance(field, AutoField)
+        )
+        self.__set('insert_columns', insert_columns)
+        self.__set('insert_sql', self.__gen_insert_sql(table_name, insert_columns))
+
+        self.__set('upsert_sql', '{insert} ON CONFLICT ({pk}) {action};'.format(
+            insert=self.__gen_insert_sql(table_name, columns),
+            pk=pk_name,
+            action=Utils.parse_fields_for_upsert(
+                [column for column in columns if column != pk_name]
+            )
+        ))
+        self.__set('delete_sql', f'DELETE FROM {table_name} WHERE {pk_name} = ?;')
+        self.__set(
+            'select_sql', f'SELECT * FROM {table_name} WHERE {pk_name} = ? LIMIT 1;'
+        )
+
+    @staticmethod
+    def __gen_insert_sql(table_name, columns):
+        if not columns:
+            return f'INSERT INTO {table_name} DEFAULT VALUES'
+        return 'INSERT INTO {table_name} {columns} VALUES {values}'.format(
+            table_name=table_name,
+            columns=Utils.format_as_sql_columns_tuple(columns),
+            values=Utils.format_as_sql_placeholders_tuple(len(columns))
+        )
+
+    def __set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'"{self.table_name}" metadata is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'"{self.table_name}" metadata is read-only')
+
+    def __repr__(self):
+        return f'TableMeta(table={self.table_name}, columns={self.columns})'
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, size, timeout=5.0):
+        if size < 1:
+            raise ValueError('"pool_size" must be greater than 0')
+
+        self.size = size
+        self.timeout = timeout
+        self.writer = connect()
+        self.__connect = connect
+        self.__readers = []
+        self.__local = threading.local()
+        self.__idle = queue.LifoQueue()
+        self.__lock = threading.Lock()
+        self.__writer_lock = threading.RLock()
+        self.__writer_owner = None
+        self.__writer_depth = 0
+        self.__stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'total_checkout_time': 0.0,
+            'writer_acquisitions': 0,
+            'writer_total_wait_time': 0.0,
+            'writer_max_wait_time': 0.0,
+        }
+
+    @contextmanager
+    def reader(self):
+        local = self.__local
+        if not getattr(local, 'depth', 0):
+            local.reader = self.__checkout()
+        local.depth = getattr(local, 'depth', 0) + 1
+        try:
+            yield local.reader
+        finally:
+            local.depth -= 1
+            if not local.depth:
+                self.__idle.put(local.reader)
+                local.reader = None
+
+    def __checkout(self):
+        started = time.perf_counter()
+        waited = False
+        try:
+            conn = self.__idle.get_nowait()
+        except queue.Empty:
+            conn = self.__create_reader()
+
+        if conn is None:
+            waited = True
+            try:
+                conn = self.__idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self.__lock:
+                    self.__stats['timeouts'] += 1
+                raise TimeoutError(
+                    f'No pooled connection available after {self.timeout}s'
+                )
+
+        self.__record_checkout(time.perf_counter() - started, waited)
+        return conn
+
+    def __create_reader(self):
+        with self.__lock:
+            if len(self.__readers) >= self.size:
+                return None
+            conn = self.__connect(read_only=True)
+            self.__readers.append(conn)
+            return conn
+
+    def __record_checkout(self, elapsed, waited):
+        with self.__lock:
+            self.__stats['checkouts'] += 1
+            self.__stats['total_checkout_time'] += elapsed
+            if waited:
+                self.__stats['waits'] += 1
+                self.__stats['total_wait_time'] += elapsed
+                self.__stats['max_wait_time'] = max(
+                    self.__stats['max_wait_time'], elapsed
+                )
+
+    def acquire_writer(self):
+        started = time.perf_counter()
+        if not self.__writer_lock.acquire(timeout=self.timeout):
+            with self.__lock:
+                self.__stats['timeouts'] += 1
+            raise TimeoutError(
+                f'Writer connection not available after {self.timeout}s'
+            )
+
+        elapsed = time.perf_counter() - started
+        self.__writer_owner = threading.get_ident()
+        self.__writer_depth += 1
+        with self.__lock:
+            self.__stats['writer_acquisitions'] += 1
+            self.__stats['writer_total_wait_time'] += elapsed
+            self.__stats['writer_max_wait_time'] = max(
+                self.__stats['writer_max_wait_time'], elapsed
+            )
+        return self.writer
+
+    def release_writer(self):
+        self.__writer_depth -= 1
+        if not self.__writer_depth:
+            self.__writer_owner = None
+        self.__writer_lock.release()
+
+    @contextmanager
+    def writing(self):
+        conn = self.acquire_writer()
+        try:
+            yield conn
+        finally:
+            self.release_writer()
+
+    def owns_writer(self):
+        return self.__writer_owner == threading.get_ident()
+
+    def stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats['pool_size'] = self.size
+            stats['connections'] = len(self.__readers)
+            stats['idle'] = self.__idle.qsize()
+            stats['in_use'] = stats['connections'] - stats['idle']
+
+        checkouts = stats['checkouts']
+        stats['avg_checkout_time'] = (
+            stats['total_checkout_time'] / checkouts if checkouts else 0.0
+        )
+        return stats
+
+    def close(self):
+        with self.__lock:
+            for conn in self.__readers:
+                conn.close()
+            self.__readers = []
+            self.__idle = queue.LifoQueue()
+        self.writer.close()
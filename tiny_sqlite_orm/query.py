@@ -0,0 +1,392 @@
+from .field import ForeignKeyField
+from .utils import Utils
+
+
+class Condition:
+
+    def __init__(self, descriptor, value):
+        self.descriptor = descriptor
+        self.value = value
+
+    def compile(self, table_name=None):
+        return Utils.get_where_from_query(
+            self.descriptor, self.value, table_name
+        )
+
+
+class IsNull:
+
+    def __init__(self, column, negated=False):
+        self.column = column
+        self.negated = negated
+
+    def compile(self, table_name=None):
+        column = self.column
+        if table_name is not None:
+            column = f'{table_name}.{column}'
+        return f'{column} IS {"NOT " if self.negated else ""}NULL', ()
+
+
+class And:
+
+    def __init__(self, children=()):
+        self.children = tuple(children)
+
+    def __bool__(self):
+        return bool(self.children)
+
+    def compile(self, table_name=None):
+        if not self.children:
+            return '1', ()
+
+        where = []
+        params = []
+        for child in self.children:
+            condition, condition_params = child.compile(table_name)
+            where.append(condition)
+            params.extend(condition_params)
+
+        return ' AND '.join(where), tuple(params)
+
+
+class Or:
+
+    def __init__(self, children=()):
+        self.children = tuple(children)
+
+    def compile(self, table_name=None):
+        where = []
+        params = []
+        for child in self.children:
+            condition, condition_params = child.compile(table_name)
+            where.append(f'({condition})')
+            params.extend(condition_params)
+
+        return f'({" OR ".join(where)})', tuple(params)
+
+
+class Not:
+
+    def __init__(self, child):
+        self.child = child
+
+    def compile(self, table_name=None):
+        condition, params = self.child.compile(table_name)
+        return f'NOT ({condition})', params
+
+
+class Join:
+
+    def __init__(self, field, parent, alias, start):
+        self.field = field
+        self.parent = parent
+        self.alias = alias
+        self.table = field.ref_table
+        self.start = start
+        self.end = start + len(self.table._meta.fields)
+
+    def compile(self, parent_table_name):
+        return (
+            f'LEFT JOIN {self.table.table_name} AS {self.alias} '
+            f'ON {self.alias}.{self.table.pk._name} = '
+            f'{parent_table_name}.{self.field._name}'
+        )
+
+
+class Query:
+
+    def __init__(self, table, where=And(), order_by=(), limit=None,
+                 offset=None, distinct=False, select_related=(),
+                 prefetch_related=(), columns=(), group_by=(), annotations=(),
+                 deferred=()):
+        self.table = table
+        self.where = where
+        self.order_by = order_by
+        self.limit = limit
+        self.offset = offset
+        self.distinct = distinct
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.columns = columns
+        self.group_by = group_by
+        self.annotations = annotations
+        self.deferred = deferred
+        self.fields = self.__get_fields()
+        self.joins = self.__get_joins()
+        self.__compiled = {}
+
+    def clone(self, **changes):
+        options = {
+            'where': self.where,
+            'order_by': self.order_by,
+            'limit': self.limit,
+            'offset': self.offset,
+            'distinct': self.distinct,
+            'select_related': self.select_related,
+            'prefetch_related': self.prefetch_related,
+            'columns': self.columns,
+            'group_by': self.group_by,
+            'annotations': self.annotations,
+            'deferred': self.deferred,
+        }
+        options.update(changes)
+        return Query(self.table, **options)
+
+    def add_select_related(self, paths):
+        for path in paths:
+            self.get_related_fields(self.table, path)
+        return self.clone(select_related=self.select_related + tuple(paths))
+
+    def add_prefetch_related(self, paths):
+        for path in paths:
+            self.get_related_fields(self.table, path)
+        return self.clone(prefetch_related=self.prefetch_related + tuple(paths))
+
+    def get_related_fields(self, table, path):
+        fields = []
+        for name in path.split('__'):
+            field = table._get_field(name)
+            if not isinstance(field, ForeignKeyField):
+                raise ValueError(
+                    f'"{table.table_name}.{name}" is not a ForeignKeyField'
+                )
+            fields.append(field)
+            table = field.ref_table
+        return fields
+
+    def defer(self, names):
+        names = {self.table._get_column_name(name) for name in names}
+        return self.clone(deferred=self.deferred + tuple(
+            field._name for field in self.table._meta.fields
+            if field._name in names and field._name not in self.deferred
+        ))
+
+    def only(self, names):
+        names = {self.table._get_column_name(name) for name in names}
+        return self.clone(deferred=tuple(
+            field._name for field in self.table._meta.fields
+            if field._name not in names
+        ))
+
+    def __get_fields(self):
+        if not self.deferred:
+            return self.table._meta.fields
+
+        loaded = {self.table.pk._name} | {
+            path.split('__', 1)[0]
+            for path in self.select_related + self.prefetch_related
+        }
+        return tuple(
+            field for field in self.table._meta.fields
+            if field._name not in self.deferred or field._name in loaded
+        )
+
+    def __get_joins(self):
+        joins = {}
+        start = len(self.fields)
+        for path in self.select_related:
+            parent = None
+            for field in self.get_related_fields(self.table, path):
+                key = (parent, field._name)
+                if key not in joins:
+                    joins[key] = Join(field, parent, f't{len(joins) + 1}', start)
+                    start = joins[key].end
+                parent = joins[key].alias
+        return tuple(joins.values())
+
+    @property
+    def tables(self):
+        return (self.table.table_name,) + tuple(
+            join.table.table_name for join in self.joins
+        )
+
+    @property
+    def is_sliced(self):
+        return self.limit is not None or self.offset is not None
+
+    @property
+    def is_plain(self):
+        return not any((
+            self.where,
+            self.is_sliced,
+            self.select_related,
+            self.prefetch_related,
+            self.columns,
+            self.group_by,
+            self.annotations,
+            self.deferred,
+        ))
+
+    def filter(self, query):
+        return self.clone(where=And(
+            self.where.children + self.__get_conditions(query)
+        ))
+
+    def exclude(self, query):
+        return self.clone(where=And(
+            self.where.children + (Not(And(self.__get_conditions(query))),)
+        ))
+
+    def seek(self, columns, values, descending=False):
+        conditions = []
+        for index, column in enumerate(columns):
+            seek = self.__seek_past(column, values[index], descending)
+            if seek is None:
+                continue
+            equalities = tuple(
+                map(self.__seek_equal, columns[:index], values[:index])
+            )
+            conditions.append(And(equalities + (seek,)))
+        condition = conditions[0] if len(conditions) == 1 else Or(conditions)
+        return self.clone(where=And(self.where.children + (condition,)))
+
+    @staticmethod
+    def __seek_equal(column, value):
+        if value is None:
+            return IsNull(column)
+        return Condition(column, value)
+
+    @staticmethod
+    def __seek_past(column, value, descending):
+        # SQLite sorts NULLs first in ascending order and last in descending
+        if not descending:
+            if value is None:
+                return IsNull(column, negated=True)
+            return Condition(f'{column}__gt', value)
+        if value is None:
+            return None
+        return Or((Condition(f'{column}__lt', value), IsNull(column)))
+
+    def __get_conditions(self, query):
+        conditions = []
+        for descriptor, value in query.items():
+            column, *lookup = descriptor.split('__', 1)
+            column = self.table._get_column_name(column)
+            if lookup and lookup[0] not in Utils.gen_query_by_descriptor_functions:
+                raise ValueError(f'Unknown filter "{lookup[0]}"')
+            conditions.append(Condition('__'.join([column, *lookup]), value))
+        return tuple(conditions)
+
+    def annotate(self, annotations):
+        return self.clone(
+            group_by=self.columns,
+            annotations=self.annotations + tuple(
+                (name, aggregate.compile(self.table))
+                for name, aggregate in annotations.items()
+            )
+        )
+
+    def sort(self, columns):
+        annotation_names = {name for name, _ in self.annotations}
+        order_by = []
+        for column in columns:
+            descending = column.startswith('-')
+            column = column.lstrip('-')
+            if column not in annotation_names:
+                column = self.table._get_column_name(column)
+            order_by.append((column, descending))
+        return self.clone(order_by=tuple(order_by))
+
+    def reverse(self):
+        order_by = self.order_by or (('rowid', False),)
+        return self.clone(order_by=tuple(
+            (column, not descending) for column, descending in order_by
+        ))
+
+    def slice(self, start, stop):
+        if (start or 0) < 0 or (stop or 0) < 0:
+            raise ValueError('Negative indexing is not supported on Queryset slices')
+
+        start = start or 0
+        limit = self.limit
+        if stop is not None:
+            limit = stop - start if limit is None else min(stop, limit) - start
+        elif limit is not None:
+            limit -= start
+
+        offset = (self.offset or 0) + start
+        return self.clone(
+            limit=None if limit is None else max(limit, 0),
+            offset=offset or None
+        )
+
+    def compile(self, columns=None):
+        columns = columns or ', '.join(self.columns + tuple(
+            f'{function} AS {name}' for name, function in self.annotations
+        )) or '*'
+        if columns not in self.__compiled:
+            self.__compiled[columns] = self.__compile_select(columns)
+        return self.__compiled[columns]
+
+    def compile_where(self):
+        if self.is_sliced:
+            instruction, params = self.clone(
+                distinct=False, select_related=()
+            ).compile('rowid')
+            return f'rowid IN ({instruction})', params
+        return self.where.compile()
+
+    def compile_aggregate(self, function):
+        if self.is_sliced or self.distinct or self.group_by:
+            instruction, params = self.clone(select_related=()).compile()
+            return (
+                f'SELECT {function} FROM ({instruction})', params
+            )
+
+        where, params = self.where.compile()
+        return (
+            f'SELECT {function} FROM {self.table.table_name} WHERE {where}',
+            params
+        )
+
+    def __compile_select(self, columns):
+        if self.joins and columns == '*':
+            return self.__compile_select_with_joins()
+        if self.deferred and columns == '*':
+            columns = ', '.join(field._name for field in self.fields)
+
+        where, params = self.where.compile()
+        distinct = 'DISTINCT ' if self.distinct else ''
+        instruction = (
+            f'SELECT {distinct}{columns} FROM {self.table.table_name} '
+            f'WHERE {where}'
+        )
+        if self.group_by:
+            instruction += f' GROUP BY {", ".join(self.group_by)}'
+        return self.__compile_order_and_slice(instruction, params)
+
+    def __compile_select_with_joins(self):
+        table_name = self.table.table_name
+        columns = [f'{table_name}.*']
+        if self.deferred:
+            columns = [f'{table_name}.{field._name}' for field in self.fields]
+        columns = ', '.join(
+            columns + [f'{join.alias}.*' for join in self.joins]
+        )
+        joins = ' '.join(
+            join.compile(join.parent or table_name) for join in self.joins
+        )
+        where, params = self.where.compile(table_name)
+        distinct = 'DISTINCT ' if self.distinct else ''
+        instruction = (
+            f'SELECT {distinct}{columns} FROM {table_name} {joins} '
+            f'WHERE {where}'
+        )
+        return self.__compile_order_and_slice(instruction, params, table_name)
+
+    def __compile_order_and_slice(self, instruction, params, table_name=None):
+        if self.order_by:
+            prefix = f'{table_name}.' if table_name else ''
+            instruction += ' ORDER BY ' + ', '.join(
+                f'{prefix}{column} DESC' if descending else f'{prefix}{column}'
+                for column, descending in self.order_by
+            )
+
+        if self.is_sliced:
+            instruction += ' LIMIT ? OFFSET ?'
+            params += (
+                -1 if self.limit is None else self.limit,
+                self.offset or 0
+            )
+
+        return instruction, params
@@ -1,156 +1,625 @@
-from .record import Record
+from collections import namedtuple
+from contextlib import nullcontext
+from operator import itemgetter
+from itertools import islice
+from .aggregates import Count, Sum, Avg, Max, Min
+from .database import run_on_database
 from .field import AutoField
+from .query import Query
 from .utils import Utils
 
 
 class Queryset:
 
-    def __init__(self, table, data=[], last_instruction=''):
+    chunk_size = 100
+    prefetch_batch_size = 900
+
+    def __init__(self, table, query=None, values_mode=None):
         self.table = table
-        self.__data = data
-        self.__last_instruction = last_instruction
-        self.__current_index = 0
+        self.query = query or Query(table)
+        self.__values_mode = values_mode
+        self.__row_factory = self.__get_row_factory(values_mode)
 
     def __str__(self):
-        return self.__last_instruction
-
-    def __iter__(self):
-        return self
+        return self.query.compile()[0] + ';'
 
-    def __next__(self):
-        if self.__current_index < len(self.__data):
-            value = self.__data[self.__current_index]
-            self.__current_index += 1
-            return value
+    @property
+    def params(self):
+        return self.query.compile()[1]
 
-        self.__current_index = 0
-        raise StopIteration
+    def __iter__(self):
+        return self.iterator()
+
+    def __await__(self):
+        self.__check_is_async()
+        return self.table.db._run(list, self).__await__()
+
+    async def __aiter__(self):
+        self.__check_is_async()
+        db = self.table.db
+        records = self.iterator()
+        try:
+            while True:
+                chunk = await db._run(list, islice(records, self.chunk_size))
+                if not chunk:
+                    return
+                for record in chunk:
+                    yield record
+        finally:
+            await db._run(records.close)
+
+    def iterator(self, chunk_size=None):
+        return self.__fetch_records(self.query, chunk_size or self.chunk_size)
+
+    def iterate(self, batch_size=1000, order_by='pk'):
+        self.__check_can_paginate()
+        descending = order_by.startswith('-')
+        field = self.table._get_field(order_by.lstrip('-'))
+        columns = (field._name,)
+        if not (field is self.table.pk or field.unique):
+            columns += (self.table.pk._name,)
+
+        queryset = self.order_by(*(
+            f'-{column}' if descending else column for column in columns
+        ))
+        return self.__iterate_pages(queryset, columns, descending, batch_size)
+
+    def __iterate_pages(self, queryset, columns, descending, batch_size):
+        page = queryset
+        while True:
+            records = list(page[:batch_size])
+            yield from records
+            if len(records) < batch_size:
+                return
+
+            values = tuple(getattr(records[-1], column) for column in columns)
+            page = queryset.__clone(queryset.query.seek(columns, values, descending))
+
+    def paginate_after(self, last_pk, n):
+        self.__check_can_paginate()
+        queryset = self.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        return queryset[:n]
+
+    def __check_can_paginate(self):
+        if self.query.is_sliced:
+            raise ValueError('Cannot paginate a sliced Queryset')
+        if self.__values_mode is not None:
+            raise ValueError('Keyset pagination returns records, call it before "values"')
+
+    def __check_is_async(self):
+        if not self.table.db.is_async:
+            raise TypeError('Querysets can only be awaited on an AsyncDatabase')
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is not None:
+                raise ValueError('Queryset slices do not support steps')
+            return self.__clone(self.query.slice(index.start, index.stop))
+
         if isinstance(index, int):
-            return self.__data[index]
+            return self.table.db._run(self.__get_item, index)
         raise TypeError("Invalid Argument Type")
 
+    def __get_item(self, index):
+        if index < 0:
+            index += self.count()
+        record = None
+        if index >= 0:
+            record = self[index:index + 1].first()
+        if record is None:
+            raise IndexError('Queryset index out of range')
+        return record
+
+    @run_on_database
     def first(self):
-        return self.__get_item_or_none(0)
+        return self.__get_first_or_none(self.query)
 
+    @run_on_database
     def last(self):
-        return self.__get_item_or_none(-1)
+        if self.query.is_sliced:
+            count = self.count()
+            return self[count - 1] if count else None
+        return self.__get_first_or_none(self.query.reverse())
+
+    def __get_first_or_none(self, query):
+        records = self.__fetch_records(query.slice(0, 1), 1)
+        try:
+            return next(records, None)
+        finally:
+            records.close()
+
+    @run_on_database
+    def get(self, pk):
+        if self.__values_mode is None and self.query.is_plain:
+            record = self.__get_by_pk(pk)
+        else:
+            record = self.filter(pk=pk).first()
 
-    def __get_item_or_none(self, index):
-        if len(self.__data):
-            return self.__data[index]
-        return None
+        if record is None:
+            raise LookupError(
+                f'"{self.table.table_name}" has no record with pk "{pk}"'
+            )
+        return record
+
+    def __get_by_pk(self, pk):
+        meta = self.table._meta
+        row = self.table.db._fetch_one(
+            meta.select_sql, (Utils.convert_to_sql_param(pk),), (meta.table_name,)
+        )
+        return None if row is None else self.table._decode_row(row)
+
+    @run_on_database
+    def explain(self):
+        instruction, params = self.query.compile()
+        return self.table.db._explain(instruction, params)
+
+    @run_on_database
+    def exists(self, **query):
+        query = self.query.filter(query).slice(0, 1)
+        instruction, params = query.compile('1')
+        return self.table.db._fetch_one(
+            instruction, params, query.tables
+        ) is not None
 
     @property
     def columns(self):
-        return (field._name for field in self.table.get_fields())
+        return iter(self.table._meta.columns)
 
+    @run_on_database
     def count(self, **query):
-        return self.__aggregate_function('COUNT', '*', query)
+        return self.__aggregate_function(Count(), query)
 
+    @run_on_database
     def sum(self, column, **query):
-        return self.__aggregate_function('SUM', column, query)
+        return self.__aggregate_function(Sum(column), query)
 
+    @run_on_database
     def avg(self, column, **query):
-        return self.__aggregate_function('AVG', column, query)
+        return self.__aggregate_function(Avg(column), query)
 
+    @run_on_database
     def max(self, column, **query):
-        return self.__aggregate_function('MAX', column, query)
+        return self.__aggregate_function(Max(column), query)
 
+    @run_on_database
     def min(self, column, **query):
-        return self.__aggregate_function('MIN', column, query)
-
-    def __aggregate_function(self, function, column, query):
-        where = self.__get_where_clause_by_query(query)
-        return self.__execute(
-            f'SELECT {function}({column}) FROM {{table_name}} WHERE {where};',
-            format_function=lambda result: tuple(result)[0][0] or 0,
+        return self.__aggregate_function(Min(column), query)
+
+    def __aggregate_function(self, aggregate, query):
+        query = self.query.filter(query)
+        return self.__aggregate(query, {'value': aggregate})['value'] or 0
+
+    def __clone(self, query):
+        return Queryset(self.table, query, self.__values_mode)
+
+    def __fetch_records(self, query, chunk_size):
+        if self.__row_factory is not None:
+            return self.__fetch_values(query, chunk_size)
+        return self.__fetch_decoded_records(query, chunk_size)
+
+    def __fetch_values(self, query, chunk_size):
+        instruction, params = query.compile()
+        decode_values = self.table._get_values_decoder(query.columns)
+        row_factory = self.__row_factory
+        for rows in self.table.db._fetch(
+            instruction, params, chunk_size, query.tables
+        ):
+            for row in rows:
+                yield row_factory(decode_values(row))
+
+    def __fetch_decoded_records(self, query, chunk_size):
+        instruction, params = query.compile()
+        identity_map = {}
+        decode_row = self.table._decode_row
+        if query.deferred:
+            decode_row = self.table._get_partial_row_decoder(query.fields)
+
+        chunks = self.table.db._fetch(
+            instruction, params, chunk_size, query.tables
         )
+        prefetched = {}
+        if query.prefetch_related:
+            rows = [row for chunk in chunks for row in chunk]
+            prefetched = self.__prefetch_related(rows, query)
+            chunks = (rows,)
+
+        for rows in chunks:
+            for row in rows:
+                yield self.__gen_record_from_row(
+                    row, query.joins, prefetched, identity_map, decode_row
+                )
+
+    def __prefetch_related(self, rows, query):
+        related_paths = {}
+        for path in query.prefetch_related:
+            name, _, rest = path.partition('__')
+            related_paths.setdefault(name, [])
+            if rest:
+                related_paths[name].append(rest)
+
+        fields = query.fields
+        column_index = self.table._meta.column_index
+        prefetched = {}
+        for name, rest in related_paths.items():
+            field = self.table._get_field(name)
+            index = fields.index(field) if query.deferred else column_index[field._name]
+            pks = list({row[index] for row in rows if row[index] is not None})
+            records = {}
+            for batch in Utils.split_in_batches(pks, self.prefetch_batch_size):
+                queryset = field.ref_table.objects.filter(pk__in=batch)
+                if rest:
+                    queryset = queryset.prefetch_related(*rest)
+                records.update((record.pk, record) for record in queryset)
+            prefetched[name] = records
+        return prefetched
+
+    def __gen_record_from_row(self, row, joins, prefetched, identity_map,
+                              decode_row):
+        joined_records = {}
+        for join in reversed(joins):
+            values = row[join.start:join.end]
+            joined_records[join.alias] = self.__gen_joined_record(
+                join, values, joins, joined_records, identity_map
+            )
 
-    def __get_where_clause_by_query(self, query):
-        if not query:
-            return '1'
-
-        where = []
-        select_in_instruction = 'SELECT' in self.__last_instruction
-        where_in_instruction = 'WHERE' in self.__last_instruction
-        if select_in_instruction and where_in_instruction:
-            earlier_where = self.__last_instruction.split(
-                'WHERE '
-            )[-1].replace(';', '')
-            where.append(earlier_where)
-
-        where.extend(
-            Utils.get_where_from_query(
-                descriptor, value
-            ) for descriptor, value in query.items()
+        loaded = {
+            join.field._name: joined_records[join.alias]
+            for join in joins if join.parent is None
+        }
+        for name, records in prefetched.items():
+            loaded[name] = records
+
+        return self.__gen_record_by_query_result(
+            row, identity_map=identity_map, loaded=loaded, decode_row=decode_row
         )
-        return ' AND '.join(where)
 
-    def __execute(self, instruction, format_function=None):
+    def __gen_joined_record(self, join, values, joins, joined_records, identity_map):
+        pk_index = join.table._meta.pk_index
+        if values[pk_index] is None:
+            return None
+
+        loaded = {
+            child.field._name: joined_records[child.alias]
+            for child in joins if child.parent == join.alias
+        }
+        return {values[pk_index]: self.__gen_record_by_query_result(
+            values, table=join.table, identity_map=identity_map, loaded=loaded
+        )}
+
+    def __execute_write(self, instruction, params=()):
         instruction = instruction.format(table_name=self.table.table_name)
-        result = self.table.db._conn.execute(instruction)
-        self.table.db._conn.commit()
+        return self.table.db._execute_write(instruction, params)
+
+    def __gen_record_by_query_result(self, record, table=None,
+                                     identity_map=None, loaded={},
+                                     decode_row=None):
+        decode_row = decode_row or (table or self.table)._decode_row
+        record = decode_row(record, identity_map)
+        for name, records in loaded.items():
+            self.__set_loaded_record(getattr(record, name), records)
+        return record
+
+    def __set_loaded_record(self, reference, records):
+        if reference is not None and records and not reference.is_loaded:
+            record = records.get(reference.pk)
+            if record is not None:
+                reference._set_record(record)
 
-        if format_function is not None:
-            return format_function(result)
-        else:
-            data = [
-                self.__gen_record_by_query_result(
-                    record
-                ) for record in result
-            ]
+    def select(self, **query):
+        return self.filter(**query)
 
-        return Queryset(
-            self.table,
-            data=data,
-            last_instruction=instruction
-        )
+    def filter(self, **query):
+        if not query:
+            return self
+        return self.__clone(self.query.filter(query))
 
-    def __gen_record_by_query_result(self, record):
-        index = 0
-        attrs = {}
-        for field in self.table.get_fields():
-            attrs[field._name] = field._convert_sql_value_to_python(
-                record[index]
-            )
-            index += 1
+    def exclude(self, **query):
+        return self.__clone(self.query.exclude(query))
 
-        return Record(
-            self.table,
-            **attrs
-        )
+    def order_by(self, *columns):
+        return self.__clone(self.query.sort(columns))
 
-    def select(self, **query):
-        where = self.__get_where_clause_by_query(query)
-        return self.__execute(
-            f'SELECT * FROM {{table_name}} WHERE {where};'
-        )
+    def values(self, *fields):
+        names = self.__get_value_names(fields)
+        return Queryset(self.table, self.query.clone(columns=names), 'dict')
 
-    def update(self, fields, **query):
-        where = self.__get_where_clause_by_query(query)
-        fields = Utils.parse_fields_for_update(**fields)
+    def values_list(self, *fields, flat=False, named=False):
+        names = self.__get_value_names(fields)
+        if flat and len(names) != 1:
+            raise ValueError('"flat" is only valid when values_list has a single field')
+
+        values_mode = 'tuple'
+        if flat:
+            values_mode = 'flat'
+        elif named:
+            values_mode = 'named'
+
+        return Queryset(self.table, self.query.clone(columns=names), values_mode)
+
+    def __get_row_factory(self, values_mode):
+        if values_mode is None:
+            return None
 
-        return self.__execute(
-            f'UPDATE {{table_name}} SET {fields} WHERE {where};'
+        names = self.query.columns + tuple(
+            name for name, _ in self.query.annotations
         )
+        if values_mode == 'dict':
+            return lambda values: dict(zip(names, values))
+        if values_mode == 'flat':
+            return itemgetter(0)
+        if values_mode == 'named':
+            return namedtuple('Row', names)._make
+        return tuple
+
+    def annotate(self, **aggregates):
+        if self.__values_mode is None:
+            raise ValueError('"annotate" must be called after "values" or "values_list"')
+        if self.__values_mode == 'flat':
+            raise ValueError('"annotate" cannot be used with a flat values_list')
+
+        for name in aggregates:
+            if not name.isidentifier() or name in self.query.columns:
+                raise ValueError(f'Invalid annotation name "{name}"')
+
+        return self.__clone(self.query.annotate(aggregates))
+
+    @run_on_database
+    def aggregate(self, **aggregates):
+        if not aggregates:
+            raise ValueError('"aggregate" requires at least one aggregate')
+        return self.__aggregate(self.query, aggregates)
+
+    def __aggregate(self, query, aggregates):
+        instruction, params = query.compile_aggregate(', '.join(
+            aggregate.compile(self.table) for aggregate in aggregates.values()
+        ))
+        row = self.table.db._fetch_one(instruction, params, query.tables)
+        return dict(zip(aggregates, row))
+
+    def __get_value_names(self, fields):
+        if not fields:
+            return tuple(self.columns)
+        return tuple(self.table._get_column_name(field) for field in fields)
+
+    def only(self, *fields):
+        return self.__clone(self.query.only(fields))
+
+    def defer(self, *fields):
+        return self.__clone(self.query.defer(fields))
+
+    def select_related(self, *fields):
+        return self.__clone(self.query.add_select_related(fields))
+
+    def prefetch_related(self, *fields):
+        return self.__clone(self.query.add_prefetch_related(fields))
+
+    def limit(self, limit):
+        return self.__clone(self.query.clone(limit=limit))
+
+    def offset(self, offset):
+        return self.__clone(self.query.clone(offset=offset))
+
+    def distinct(self):
+        return self.__clone(self.query.clone(distinct=True))
+
+    @run_on_database
+    def update(self, fields, **query):
+        where, where_params = self.query.filter(query).compile_where()
+        fields, params = Utils.parse_fields_for_update(**fields)
+
+        return self.__execute_write(
+            f'UPDATE {{table_name}} SET {fields} WHERE {where};',
+            params + where_params
+        ).rowcount
 
+    @run_on_database
     def delete(self, **query):
-        where = self.__get_where_clause_by_query(query)
-        return self.__execute(f'DELETE FROM {{table_name}} WHERE {where};')
+        where, params = self.query.filter(query).compile_where()
+        return self.__execute_write(
+            f'DELETE FROM {{table_name}} WHERE {where};',
+            params
+        ).rowcount
 
+    @run_on_database
     def insert(self, **fields):
         self.__validate_and_format_insert_fields(fields)
-        columns, values = Utils.parse_fields_for_insert(**fields)
+        instruction, params = self.__gen_insert_instruction(fields)
+
+        if self.table.db.supports_returning:
+            row = self.table.db._execute_returning(
+                f'{instruction} RETURNING *;', params
+            )
+            return self.__gen_record_by_query_result(
+                row, decode_row=self.table._decode_written_row
+            )
+
+        result = self.table.db._execute_write(f'{instruction};', params)
+        return self.__create_record_from_insert(fields, result.lastrowid)
+
+    def __gen_insert_instruction(self, fields):
+        meta = self.table._meta
+        if len(fields) == len(meta.insert_columns):
+            return meta.insert_sql, Utils.format_as_sql_params(
+                fields[column] for column in meta.insert_columns
+            )
+
+        columns, values, params = Utils.parse_fields_for_insert(**fields)
+        return f'INSERT INTO {meta.table_name} {columns} VALUES {values}', params
 
-        return self.__execute(
-            f'INSERT INTO {{table_name}} {columns} VALUES {values};',
-            format_function=lambda _: self.__create_record_from_insert(fields)
+    def _upsert_record(self, record):
+        meta = self.table._meta
+        params = []
+        for field in meta.fields:
+            if field is meta.pk:
+                params.append(record.pk)
+                continue
+            value = getattr(record, field._name)
+            field._check_field_value(value)
+            params.append(value)
+        return self.table.db._execute_write(
+            meta.upsert_sql, Utils.format_as_sql_params(params)
+        ).rowcount
+
+    def _delete_record(self, record):
+        return self.table.db._execute_write(
+            self.table._meta.delete_sql, (Utils.convert_to_sql_param(record.pk),)
+        ).rowcount
+
+    @run_on_database
+    def bulk_insert(self, rows, batch_size=1000, return_records=True):
+        rows, columns = self.__validate_bulk_insert_rows(rows, 'bulk_insert')
+        if not rows:
+            return [] if return_records else 0
+
+        instruction = self.__gen_bulk_insert_instruction(columns) + ';'
+        sets_pk = self.table.pk._name in columns
+        db = self.table.db
+
+        for batch in Utils.split_in_batches(rows, batch_size):
+            with db._transaction():
+                db._executemany_write(instruction, (
+                    Utils.format_as_sql_params(
+                        row[column] for column in columns
+                    ) for row in batch
+                ))
+                if return_records and not sets_pk:
+                    self.__set_bulk_inserted_pks(db, batch)
+
+        if not return_records:
+            return len(rows)
+
+        identity_map = {}
+        return [self.__decode_inserted_row(row, identity_map) for row in rows]
+
+    @run_on_database
+    def bulk_update(self, records, fields, batch_size=1000):
+        fields = [self.table._get_field(name) for name in fields]
+        if not fields:
+            raise ValueError('"bulk_update" requires at least one field')
+        if self.table.pk in fields:
+            raise ValueError('"bulk_update" cannot change primary keys')
+
+        columns, _ = Utils.parse_fields_for_update(
+            **{field._name: None for field in fields}
+        )
+        where, where_params = self.query.compile_where()
+        instruction = (
+            f'UPDATE {self.table.table_name} SET {columns} '
+            f'WHERE {self.table.pk._name} = ? AND ({where});'
         )
 
+        rowcount = 0
+        db = self.table.db
+        with db._transaction():
+            for batch in Utils.split_in_batches(list(records), batch_size):
+                rowcount += db._executemany_write(instruction, (
+                    self.__get_bulk_update_params(record, fields) + where_params
+                    for record in batch
+                )).rowcount
+        return rowcount
+
+    @staticmethod
+    def __get_bulk_update_params(record, fields):
+        values = []
+        for field in fields:
+            value = getattr(record, field._name)
+            field._check_field_value(value)
+            values.append(value)
+        values.append(record.pk)
+        return Utils.format_as_sql_params(values)
+
+    @run_on_database
+    def bulk_delete(self, pks, batch_size=500):
+        rowcount = 0
+        with self.table.db._transaction():
+            for batch in Utils.split_in_batches(list(pks), batch_size):
+                where, params = self.query.filter({'pk__in': batch}).compile_where()
+                rowcount += self.__execute_write(
+                    f'DELETE FROM {{table_name}} WHERE {where};',
+                    params
+                ).rowcount
+        return rowcount
+
+    @run_on_database
+    def upsert(self, rows, conflict_target, update_fields=None, batch_size=1000):
+        rows = [dict(row) for row in rows]
+        given_columns = {column for row in rows for column in row}
+        rows, columns = self.__validate_bulk_insert_rows(rows, 'upsert')
+        if not rows:
+            return 0
+
+        conflict_target = [
+            self.table._get_column_name(name) for name in conflict_target
+        ]
+        if not conflict_target:
+            raise ValueError('"upsert" requires a "conflict_target"')
+
+        if update_fields is None:
+            fixed_columns = {*conflict_target, self.table.pk._name}
+            update_fields = [
+                column for column in columns
+                if column in given_columns and column not in fixed_columns
+            ]
+        update_fields = [self.table._get_column_name(name) for name in update_fields]
+
+        instruction = '{insert} ON CONFLICT {target} {action};'.format(
+            insert=self.__gen_bulk_insert_instruction(columns),
+            target=Utils.format_as_sql_columns_tuple(conflict_target),
+            action=Utils.parse_fields_for_upsert(update_fields)
+        )
+
+        rowcount = 0
+        db = self.table.db
+        with db._transaction() if len(rows) > 1 else nullcontext():
+            for batch in Utils.split_in_batches(rows, batch_size):
+                rowcount += db._executemany_write(instruction, (
+                    Utils.format_as_sql_params(
+                        row[column] for column in columns
+                    ) for row in batch
+                )).rowcount
+        return rowcount
+
+    def __gen_bulk_insert_instruction(self, columns):
+        return 'INSERT INTO {table_name} {columns} VALUES {values}'.format(
+            table_name=self.table.table_name,
+            columns=Utils.format_as_sql_columns_tuple(columns),
+            values=Utils.format_as_sql_placeholders_tuple(len(columns))
+        )
+
+    def __validate_bulk_insert_rows(self, rows, method_name):
+        rows = [self.__validate_bulk_insert_row(row) for row in rows]
+        if not rows:
+            return rows, ()
+
+        for row in rows:
+            if row.keys() != rows[0].keys():
+                raise ValueError(
+                    f'All rows passed to "{method_name}" must set the same fields'
+                )
+        return rows, tuple(rows[0])
+
+    def __validate_bulk_insert_row(self, row):
+        row = dict(row)
+        columns = self.table._meta.fields_by_name
+        for column in row:
+            if column not in columns:
+                raise ValueError(
+                    f'"{self.table.table_name}" has no field "{column}"'
+                )
+
+        self.__validate_and_format_insert_fields(row)
+        return row
+
+    def __set_bulk_inserted_pks(self, db, batch):
+        last_pk = db._fetch_one('SELECT last_insert_rowid();')[0]
+        first_pk = last_pk - len(batch) + 1
+        for index, row in enumerate(batch):
+            row[self.table.pk._name] = first_pk + index
+
     def __validate_and_format_insert_fields(self, fields):
-        for field in self.table.get_fields():
+        for field in self.table._meta.fields:
             if isinstance(field, AutoField):
                 continue
 
@@ -166,6 +635,14 @@ class Queryset:
     def __set_to_default_value(self, field, fields):
         fields[field._name] = field.default
 
-    def __create_record_from_insert(self, fields):
-        query = self.select(**fields)
-        return query.last()
+    def __create_record_from_insert(self, fields, lastrowid):
+        pk_name = self.table.pk._name
+        if fields.get(pk_name) is None and isinstance(self.table.pk, AutoField):
+            fields[pk_name] = lastrowid
+        return self.__decode_inserted_row(fields)
+
+    def __decode_inserted_row(self, fields, identity_map=None):
+        row = Utils.format_as_sql_params(
+            fields.get(column) for column in self.table._meta.columns
+        )
+        return self.table._decode_written_row(row, identity_map)
@@ -1,58 +1,173 @@
+from .database import run_on_database
+
+
 class Record:
 
-    def __init__(self, table, **kwargs):
-        self.table = table
-        self.__attrs = kwargs
-        for attr, value in kwargs.items():
-            setattr(self, attr, value)
-        self.__define_pk()
+    __slots__ = ()
+
+    table = None
+    _field_names = ()
+    _field_defaults = ()
+    _slot_setters = ()
+
+    def __init__(self, **kwargs):
+        for name, default in zip(self._field_names, self._field_defaults):
+            setattr(self, name, kwargs.pop(name, default))
+        if kwargs:
+            raise ValueError(
+                f'"{self.table.table_name}" has no field "{next(iter(kwargs))}"'
+            )
+
+    @classmethod
+    def _create_class(cls, table):
+        names = table._meta.columns
+        namespace = {
+            '__slots__': names,
+            'table': table,
+            '_field_names': names,
+            '_field_defaults': tuple(field.default for field in table._meta.fields),
+        }
+        for field in table._meta.foreign_keys:
+            reference_name = f'{field._name}_id'
+            if reference_name not in names:
+                namespace[reference_name] = cls.__reference_id_property(field._name)
+
+        record_class = type(f'{table.__name__}Record', (cls,), namespace)
+        record_class._slot_setters = record_class._get_slot_setters(names)
+        return record_class
+
+    @classmethod
+    def _get_slot_setters(cls, names):
+        return tuple(cls.__dict__[name].__set__ for name in names)
+
+    @staticmethod
+    def __reference_id_property(name):
+        def get_reference_id(self):
+            value = getattr(self, name)
+            return getattr(value, 'pk', value)
+        return property(get_reference_id)
+
+    @classmethod
+    def _from_values(cls, values, slot_setters=None):
+        record = cls.__new__(cls)
+        for set_value, value in zip(slot_setters or cls._slot_setters, values):
+            set_value(record, value)
+        return record
+
+    def __getattr__(self, name):
+        if name not in self._field_names:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        self.table.db._call(self.__load_deferred_fields)
+        return object.__getattribute__(self, name)
 
-    def __define_pk(self):
-        value = self.__attrs.get(self.table.pk._name)
+    def __load_deferred_fields(self):
+        deferred = [
+            name for name in self._field_names if not self.__is_loaded(name)
+        ]
+        record = self.table.objects.filter(pk=self.pk).only(*deferred).first()
+        if record is None:
+            raise LookupError(
+                f'"{self.table.table_name}" has no record with pk "{self.pk}"'
+            )
+        for name in deferred:
+            setattr(self, name, getattr(record, name))
+
+    def __is_loaded(self, name):
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    @property
+    def pk(self):
+        value = getattr(self, self.table.pk._name)
         if value is None:
             value = self.table.pk.default
-        self.pk = value
+        return value
+
+    @pk.setter
+    def pk(self, value):
+        setattr(self, self.table.pk._name, value)
 
     @property
     def attrs(self):
-        for name in self.__attrs:
-            self.__attrs[name] = getattr(self, name)
-        return self.__attrs
+        return {name: getattr(self, name) for name in self._field_names}
 
+    @run_on_database
     def delete(self):
-        return self.table.objects.delete(
-            **self.__get_self_where()
-        )
+        return self.table.objects._delete_record(self)
 
+    @run_on_database
     def save(self):
-        result = self.__check_if_exists()
-
-        if result:
-            self._update()
-        else:
+        if self.pk is None:
             self._create()
-
+        else:
+            self.table.objects._upsert_record(self)
         return self
 
     def _create(self):
-        self.table.objects.insert(self.attrs)
+        fields = self.attrs
+        pk_name = self.table.pk._name
+        if pk_name not in self.table._meta.insert_columns:
+            del fields[pk_name]
+        self.pk = self.table.objects.insert(**fields).pk
 
-    def _update(self):
-        self.table.objects.update(
-            self.attrs,
-            **self.__get_self_where()
+    def __repr__(self):
+        return 'Record(table={}, pk={})'.format(
+            self.table.table_name,
+            self.pk
         )
 
-    def __check_if_exists(self):
-        return self.table.objects.select(
-            **self.__get_self_where()
-        ).first()
 
-    def __get_self_where(self):
-        return {self.table.pk._name: self.pk}
+class RecordReference:
+
+    __slots__ = ('table', 'pk', '_RecordReference__record')
+
+    def __init__(self, table, pk, record=None):
+        object.__setattr__(self, 'table', table)
+        object.__setattr__(self, 'pk', pk)
+        object.__setattr__(self, '_RecordReference__record', record)
+
+    @property
+    def is_loaded(self):
+        return self.__record is not None
+
+    @property
+    def record(self):
+        if self.__record is None:
+            self.table.db._call(self.__load)
+        return self.__record
+
+    def load(self):
+        return self.table.db._run(self.__load)
+
+    def __load(self):
+        if self.__record is None:
+            self._set_record(self.table.objects.get(self.pk))
+        return self.__record
+
+    def _set_record(self, record):
+        object.__setattr__(self, '_RecordReference__record', record)
+
+    def __getattr__(self, name):
+        return getattr(self.record, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.record, name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, RecordReference)):
+            return self.table is other.table and self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.table, self.pk))
 
     def __repr__(self):
-        return 'Record(table={}, pk={})'.format(
+        return 'RecordReference(table={}, pk={})'.format(
             self.table.table_name,
             self.pk
         )
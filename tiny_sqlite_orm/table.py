@@ -1,31 +1,48 @@
-from .field import Field, AutoField
+from .field import Field, AutoField, ForeignKeyField
+from .index import Index
+from .meta import TableMeta
 from .queryset import Queryset
+from .record import Record
 
 
 class Table:
 
     db = None
     _schema = None
+    _indexes_schema = ()
+    indexes = ()
 
     @classmethod
     def create(cls, **kwargs) -> None:
         return cls.objects.insert(**kwargs)
 
+    @classmethod
+    def bulk_create(cls, rows, batch_size=1000, return_records=True):
+        return cls.objects.bulk_insert(
+            rows,
+            batch_size=batch_size,
+            return_records=return_records
+        )
+
     @classmethod
     def _initialize_and_create_table(cls, db):
         cls.db = db
-        db._conn.execute(cls._schema)
+        db._execute_schema(cls._schema)
+        for index_schema in cls._indexes_schema:
+            db._execute_schema(index_schema)
 
     def __init_subclass__(cls):
         cls.__set_attributes()
         cls.__set_fields_name()
         cls.__handle_primary_key()
+        cls.__cache_fields()
+        cls.objects = Queryset(cls)
         cls.__mount_schema()
+        cls.__mount_indexes_schema()
 
     @classmethod
     def __set_attributes(cls):
         cls.table_name = cls.__name__.lower()
-        cls.objects = Queryset(cls)
         cls.pk = None
 
     @classmethod
@@ -40,18 +57,107 @@ class Table:
 
     @classmethod
     def __handle_primary_key(cls):
-        for field in cls.get_fields():
+        for field in cls.__scan_fields():
             if field.primary_key:
                 return cls.__set_pk(field)
 
         cls.__create_id_and_set_as_pk()
 
     @classmethod
-    def get_fields(cls):
+    def __scan_fields(cls):
         for attr_name, attr in cls.__dict__.items():
             if cls.__is_field(attr) and attr_name != 'pk':
                 yield attr
 
+    @classmethod
+    def __cache_fields(cls):
+        cls._meta = TableMeta(cls.table_name, cls.__scan_fields(), cls.pk)
+        cls._record_class = Record._create_class(cls)
+        cls._decode_row = staticmethod(cls.__build_row_decoder(cls._meta.fields))
+        cls._decode_written_row = staticmethod(
+            cls.__build_row_decoder(cls._meta.fields, convert_all=True)
+        )
+        cls._values_decoders = {}
+        cls._partial_row_decoders = {}
+
+    @classmethod
+    def __build_row_decoder(cls, fields, slot_setters=None, convert_all=False):
+        from_values = cls._record_class._from_values
+        length = len(fields)
+        converters = cls.__get_converters(fields, convert_all)
+        references = tuple(
+            (index, field._convert_sql_value_to_python)
+            for index, field in enumerate(fields)
+            if isinstance(field, ForeignKeyField)
+        )
+
+        def decode_row(row, identity_map=None):
+            values = list(row[:length])
+            for index, convert in converters:
+                if values[index] is not None:
+                    values[index] = convert(values[index])
+            for index, convert in references:
+                values[index] = convert(values[index], identity_map)
+            return from_values(values, slot_setters)
+
+        return decode_row
+
+    @classmethod
+    def _get_partial_row_decoder(cls, fields):
+        if fields not in cls._partial_row_decoders:
+            slot_setters = cls._record_class._get_slot_setters(
+                tuple(field._name for field in fields)
+            )
+            cls._partial_row_decoders[fields] = cls.__build_row_decoder(
+                fields, slot_setters
+            )
+        return cls._partial_row_decoders[fields]
+
+    @classmethod
+    def _get_values_decoder(cls, names):
+        if names not in cls._values_decoders:
+            fields = tuple(cls._get_field(name) for name in names)
+            converters = cls.__get_converters(fields)
+
+            def decode_values(row):
+                values = list(row)
+                for index, convert in converters:
+                    if values[index] is not None:
+                        values[index] = convert(values[index])
+                return values
+
+            cls._values_decoders[names] = decode_values
+        return cls._values_decoders[names]
+
+    @staticmethod
+    def __get_converters(fields, convert_all=False):
+        # Rows read back by SELECT already carry the column's storage type;
+        # rows built from Python input or RETURNING may not
+        return tuple(
+            (index, field._convert_sql_value_to_python)
+            for index, field in enumerate(fields)
+            if (convert_all or field._converts_sql_value)
+            if not isinstance(field, ForeignKeyField)
+        )
+
+    @classmethod
+    def get_fields(cls):
+        return iter(cls._meta.fields)
+
+    @classmethod
+    def _get_field(cls, name):
+        if name == 'pk':
+            return cls.pk
+
+        field = cls._meta.fields_by_name.get(name)
+        if field is None:
+            raise ValueError(f'"{cls.table_name}" has no field "{name}"')
+        return field
+
+    @classmethod
+    def _get_column_name(cls, name):
+        return cls._get_field(name)._name
+
     @classmethod
     def __create_id_and_set_as_pk(cls):
         cls.id = AutoField(
@@ -73,11 +179,31 @@ class Table:
             f'({columns_schema});'
         )
 
+    @classmethod
+    def __mount_indexes_schema(cls):
+        cls._indexes_schema = tuple(dict.fromkeys(
+            index._mount_schema(cls) for index in cls.__get_indexes()
+        ))
+
+    @classmethod
+    def __get_indexes(cls):
+        indexed = set()
+        for index in cls.indexes:
+            if not index.where:
+                indexed.add(index.columns[0].lstrip('-'))
+            yield index
+
+        for field in cls._meta.fields:
+            if field.unique or field.primary_key or field._name in indexed:
+                continue
+            if field.index or isinstance(field, ForeignKeyField):
+                yield Index(field._name)
+
     @classmethod
     def __get_columns_schema(cls):
-        fields_schema = ', '.join(field._schema for field in cls.get_fields())
+        fields_schema = ', '.join(field._schema for field in cls._meta.fields)
         foreign_keys_schema = ', '.join(
-            field.foreign_key_schema for field in cls.get_fields() if hasattr(field, 'foreign_key_schema')
+            field.foreign_key_schema for field in cls._meta.foreign_keys
         )
         columns_schema = [fields_schema]
         if foreign_keys_schema:
@@ -1,18 +1,18 @@
 from datetime import date
-from tiny_sqlite_orm.record import Record
+from tiny_sqlite_orm.record import Record, RecordReference
 
 
 class Utils:
 
     gen_query_by_descriptor_functions = {
-        'lt': '{column} < {value}',
-        'le': '{column} <= {value}',
-        'gt': '{column} > {value}',
-        'ge': '{column} >= {value}',
-        'ne': '{column} <> {value}',
-        'in': '{column} IN {value_as_tuple}',
-        'contains': 'instr({column}, {value}) > 0',
-        'icontains': '{column} LIKE lower(\'%{raw_value}%\')'
+        'lt': '{column} < ?',
+        'le': '{column} <= ?',
+        'gt': '{column} > ?',
+        'ge': '{column} >= ?',
+        'ne': '{column} <> ?',
+        'in': '{column} IN {placeholders}',
+        'contains': 'instr({column}, ?) > 0',
+        'icontains': '{column} LIKE lower(?)'
     }
 
     def convert_to_sql_type(value):
@@ -25,59 +25,86 @@ class Utils:
         if isinstance(value, str) or isinstance(value, date):
             return f'\'{value}\''
 
-        if isinstance(value, Record):
+        if isinstance(value, (Record, RecordReference)):
             return Utils.convert_to_sql_type(
                 value.pk
             )
 
         return str(value)
 
+    def convert_to_sql_param(value):
+        if isinstance(value, date):
+            return str(value)
+
+        if isinstance(value, (Record, RecordReference)):
+            return Utils.convert_to_sql_param(
+                value.pk
+            )
+
+        return value
+
     def format_as_sql_columns_tuple(items):
         return f"({', '.join(items)})"
 
-    def format_as_sql_values_tuple(items):
-        items = map(
-            Utils.convert_to_sql_type,
+    def format_as_sql_placeholders_tuple(length):
+        return f"({', '.join('?' * length)})"
+
+    def format_as_sql_params(items):
+        return tuple(map(
+            Utils.convert_to_sql_param,
             items
-        )
-        return f"({', '.join(items)})"
+        ))
+
+    def split_in_batches(items, batch_size):
+        if batch_size < 1:
+            raise ValueError('"batch_size" must be greater than 0')
+        for start in range(0, len(items), batch_size):
+            yield items[start:start + batch_size]
 
     def parse_fields_for_insert(**fields):
         if not fields:
-            return 'DEFAULT', ''
+            return 'DEFAULT', '', ()
         columns = Utils.format_as_sql_columns_tuple(fields.keys())
-        values = Utils.format_as_sql_values_tuple(fields.values())
-        return columns, values
+        values = Utils.format_as_sql_placeholders_tuple(len(fields))
+        params = Utils.format_as_sql_params(fields.values())
+        return columns, values, params
 
     def parse_fields_for_update(**fields):
-        return ', '.join(
-            [f'{column} = {Utils.convert_to_sql_type(value)}' for column, value in fields.items()]
+        columns = ', '.join(
+            [f'{column} = ?' for column in fields]
         )
+        return columns, Utils.format_as_sql_params(fields.values())
 
-    def get_where_from_query(query_descriptor, value):
+    def parse_fields_for_upsert(columns):
+        if not columns:
+            return 'DO NOTHING'
+        return 'DO UPDATE SET ' + ', '.join(
+            [f'{column} = excluded.{column}' for column in columns]
+        )
+
+    def get_where_from_query(query_descriptor, value, table_name=None):
         query_descriptor = query_descriptor.split('__')
 
         column = query_descriptor[0]
-        where_text = '{column} = {value}'
+        if table_name is not None:
+            column = f'{table_name}.{column}'
+        where_text = '{column} = ?'
         if len(query_descriptor) > 1:
             where_text = Utils.gen_query_by_descriptor_functions.get(
                 query_descriptor[-1]
             )
+            if where_text is None:
+                raise ValueError(f'Unknown filter "{query_descriptor[-1]}"')
+            if query_descriptor[-1] == 'icontains':
+                value = f'%{value}%'
 
-        if '{raw_value}' in where_text:
-            return where_text.format(
-                column=column,
-                raw_value=value
-            )
-
-        elif '{value_as_tuple}' in where_text:
-            value = Utils.format_as_sql_values_tuple(value)
+        if '{placeholders}' in where_text:
+            value = tuple(value)
             return where_text.format(
                 column=column,
-                value_as_tuple=value
-            )
+                placeholders=Utils.format_as_sql_placeholders_tuple(len(value))
+            ), Utils.format_as_sql_params(value)
 
         return where_text.format(
-            column=column,
-            value=Utils.convert_to_sql_type(value)
-        )
+            column=column
+        ), (Utils.convert_to_sql_param(value),)